@@ -0,0 +1,269 @@
+
+# coding: utf-8
+
+# # Movie Data Analysis - Command Line Entry Point
+
+# Runs the analysis of Project_Movie_Data_Analysis.py from the command line, section by section:
+#
+#     python movie_analysis.py --data tmdb-movies.csv --only correlations,directors
+#
+# Start up is kept short:
+# - only the standard library is imported with this module, pandas/numpy are imported when the data is first needed and
+#   matplotlib only when figures are requested with --plots (seaborn is not used)
+# - the wrangled data is cached next to the csv file, one cache per engine (tmdb-movies.csv.pandas.cache.pkl), and loaded
+#   from there on the following runs, as long as the csv file is unchanged
+# - --only runs the selected sections
+#
+# --timings prints the time to the first result; --check-startup measures the import time and the time to the first result
+# in a fresh interpreter and fails when they exceed their budgets (or when a heavy library is imported with the module).
+
+import argparse
+import os
+import sys
+import time
+
+
+DEFAULT_DATA='tmdb-movies.csv'
+
+# libraries that must not be imported by "import movie_analysis"
+
+HEAVY_MODULES=['pandas', 'numpy', 'matplotlib', 'seaborn', 'scipy', 'pyarrow']
+
+# start up budgets in seconds, checked by --check-startup
+
+IMPORT_BUDGET=0.05
+FIRST_RESULT_BUDGET=2.0
+
+# results of the data wrangling, loaded on first access
+
+_loaded={}
+
+
+# define a function that takes in the path of the csv file and the engine and returns the path of its cache file and the
+# key identifying the version of the csv file it was built from
+
+def cache_location(path, engine):
+    status=os.stat(path)
+    return '{}.{}.cache.pkl'.format(path, engine), (os.path.abspath(path), status.st_mtime_ns, status.st_size, engine)
+
+
+# define a function that takes in the path of the csv file and returns the results of the data wrangling (see
+# movie_engine.run_pipeline, which includes the number of movies of the original data). The results are read from the
+# cache file when it matches the csv file, otherwise they are computed and the cache file is written
+
+def load_results(path=DEFAULT_DATA, engine='pandas', use_cache=True):
+    if (path, engine) in _loaded:
+        return _loaded[(path, engine)]
+
+    import pickle
+
+    cache_path, key=cache_location(path, engine)
+    results=None
+    if use_cache and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as cache:
+            cached=pickle.load(cache)
+        if cached.get('key') == key:
+            results=cached['results']
+
+    if results is None:
+        import movie_engine
+
+        # the csv file is read by the engine itself (pyarrow's reader for the arrow engine)
+        results=movie_engine.run_pipeline(engine, path)
+        if use_cache:
+            with open(cache_path, 'wb') as cache:
+                pickle.dump({'key': key, 'results': results}, cache, protocol=pickle.HIGHEST_PROTOCOL)
+
+    _loaded[(path, engine)]=results
+    return results
+
+
+# define a function that returns matplotlib.pyplot, imported on first use only
+
+def pyplot():
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# ## Sections
+# Every section takes in the results of load_results and the command line options and prints its figures
+
+def section_summary(results, options):
+    print("The original data has a total of {} movies.".format(results['original_movies']))
+    print("After all the data wrangling, we are left with {} movies to perform our analysis.".format(
+        len(results['movies'])))
+
+
+def section_genres(results, options):
+    movies=results['movies']
+    print("Number of movies per genre in the data:")
+    print(movies['genres'].value_counts())
+
+    year_genre=movies.groupby(['release_year', 'genres'])['popularity'].mean().rename('mean_popularity').reset_index()
+    popularity_year=year_genre.loc[year_genre.groupby('release_year')['mean_popularity'].idxmax()]
+    print("\nMost popular movie genre in a given year:")
+    print(popularity_year.to_string(index=False))
+
+    genres=results['genres']
+    print("\nTop Genres as per budget:")
+    print(genres.nlargest(3, 'budget_adj').to_string(index=False))
+    print("\nTop Genres as per ROI:")
+    print(genres.nlargest(3, 'ROI(%)').to_string(index=False))
+    print("\nBottom Genres as per ROI:")
+    print(genres.nsmallest(3, 'ROI(%)').to_string(index=False))
+
+    if options.plots:
+        plt=pyplot()
+        popularity_year.set_index(['release_year', 'genres']).iloc[-10:].plot(kind='bar', figsize=(10, 5))
+        plt.ylabel('Average Popularity')
+        plt.xlabel('Release Year & Genres')
+        plt.title('Most Popular Movies in a Year')
+
+
+def section_years(results, options):
+    years=results['release_year']
+    print("Pearson r between release year and average vote count: {:.4f}".format(
+        years['release_year'].corr(years['vote_count'])))
+    print("Pearson r between popularity and release year: {:.4f}".format(
+        years['popularity'].corr(years['release_year'])))
+
+    if options.plots:
+        plt=pyplot()
+        years.plot(kind='bar', figsize=(10, 5), x='release_year', y='vote_count')
+        plt.ylabel('Average Vote Count')
+        plt.xlabel('Release Year')
+        plt.title('Average Vote Count Over Time')
+
+
+def section_correlations(results, options):
+    import movie_engine
+
+    movies=results['movies']
+    for first, second in movie_engine.CORRELATIONS:
+        print("Pearson r between {} and {}: {:.4f}".format(first, second, movies[first].corr(movies[second])))
+
+
+def section_companies(results, options):
+    import movie_leaderboard
+
+    print("Top 10 production companies in terms of number of movies made:")
+    print(results['production_companies'].iloc[0:10])
+
+    board=movie_leaderboard.Leaderboard(results['movies'], 'production_companies')
+    print("\nProduction companies with highest ROIs (at least {} movies):".format(options.min_support))
+    print(board.top('ROI(%)', k=options.top, min_support=options.min_support, by=options.rank_by))
+
+
+def section_directors(results, options):
+    import movie_leaderboard
+
+    board=movie_leaderboard.Leaderboard(results['movies'], 'director')
+    print("Top {} Directors with highest revenues (at least {} movies):".format(options.top, options.min_support))
+    print(board.top('revenue_adj', k=options.top, min_support=options.min_support, by=options.rank_by))
+
+
+SECTIONS={'summary': section_summary,
+          'genres': section_genres,
+          'years': section_years,
+          'correlations': section_correlations,
+          'companies': section_companies,
+          'directors': section_directors}
+
+
+# ## Start up measurements
+
+# define a function that measures, in a fresh interpreter, the time to import this module (and which heavy libraries
+# that imports) and the time to the first result (import, load the cached data and print the summary). Returns a
+# dictionary of the measurements
+
+def measure_startup(path=DEFAULT_DATA, engine='pandas'):
+    import json
+    import subprocess
+
+    script=("import json, sys, time\n"
+            "start=time.perf_counter()\n"
+            "import movie_analysis\n"
+            "imported=time.perf_counter()\n"
+            "heavy=[name for name in movie_analysis.HEAVY_MODULES if name in sys.modules]\n"
+            "import contextlib, io\n"
+            "with contextlib.redirect_stdout(io.StringIO()):\n"
+            "    movie_analysis.section_summary(movie_analysis.load_results({!r}, {!r}), None)\n"
+            "first=time.perf_counter()\n"
+            "print(json.dumps({{'import': imported-start, 'first_result': first-start, 'heavy_modules': heavy}}))\n"
+            ).format(os.path.abspath(path), engine)
+    directory=os.path.dirname(os.path.abspath(__file__))
+    # warm the data cache first so that the measurement reflects a normal run
+    load_results(path, engine)
+    output=subprocess.run([sys.executable, '-c', script], cwd=directory, check=True, capture_output=True, text=True,
+                          env=dict(os.environ, PYTHONPATH=os.pathsep.join([directory, os.environ.get('PYTHONPATH', '')])))
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+# define a function that takes in the start up measurements and returns the list of budgets that are exceeded
+
+def startup_problems(measurements, import_budget=IMPORT_BUDGET, first_result_budget=FIRST_RESULT_BUDGET):
+    problems=[]
+    if measurements['heavy_modules']:
+        problems.append("importing movie_analysis imports {}".format(', '.join(measurements['heavy_modules'])))
+    if measurements['import'] > import_budget:
+        problems.append("import time {:.3f}s exceeds {:.3f}s".format(measurements['import'], import_budget))
+    if measurements['first_result'] > first_result_budget:
+        problems.append("time to first result {:.3f}s exceeds {:.3f}s".format(measurements['first_result'],
+                                                                              first_result_budget))
+    return problems
+
+
+def parse_arguments(arguments=None):
+    parser=argparse.ArgumentParser(description="Movie data analysis of the TMDb movies data set.")
+    parser.add_argument('--data', default=DEFAULT_DATA, help="csv file of the movies (default: %(default)s)")
+    parser.add_argument('--engine', default='pandas', choices=['pandas', 'arrow'], help="execution engine")
+    parser.add_argument('--only', default=None,
+                        help="comma separated sections to run among: {}".format(', '.join(SECTIONS)))
+    parser.add_argument('--plots', action='store_true', help="draw the figures of the sections")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write the cache of the wrangled data")
+    parser.add_argument('--top', type=int, default=10, help="size of the leaderboards (default: %(default)s)")
+    parser.add_argument('--min-support', type=int, default=10,
+                        help="minimum number of movies for a leaderboard entry (default: %(default)s)")
+    parser.add_argument('--rank-by', default='mean', choices=['mean', 'bayes', 'count'],
+                        help="leaderboard ranking (default: %(default)s)")
+    parser.add_argument('--timings', action='store_true', help="print the time to the first result")
+    parser.add_argument('--check-startup', action='store_true',
+                        help="measure the start up in a fresh interpreter and fail when it exceeds its budgets")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None, started=None):
+    options=parse_arguments(arguments)
+
+    if options.check_startup:
+        measurements=measure_startup(options.data, options.engine)
+        print("import: {import:.3f}s, first result: {first_result:.3f}s".format(**measurements))
+        problems=startup_problems(measurements)
+        for problem in problems:
+            print("Start up check failed: {}".format(problem), file=sys.stderr)
+        return 1 if problems else 0
+
+    sections=list(SECTIONS)
+    if options.only is not None:
+        sections=[name for name in (name.strip() for name in options.only.split(',')) if name]
+    unknown=[name for name in sections if name not in SECTIONS]
+    if unknown:
+        print("Unknown section(s): {}. Available sections: {}".format(', '.join(unknown), ', '.join(SECTIONS)),
+              file=sys.stderr)
+        return 2
+
+    results=load_results(options.data, options.engine, use_cache=not options.no_cache)
+    for number, name in enumerate(sections):
+        print("\n## {}\n".format(name.capitalize()))
+        SECTIONS[name](results, options)
+        if number == 0 and options.timings and started is not None:
+            print("\n[time to first result: {:.3f}s]".format(time.perf_counter()-started))
+
+    if options.plots:
+        pyplot().show()
+    return 0
+
+
+if __name__ == '__main__':
+    _started=time.perf_counter()
+    sys.exit(main(started=_started))
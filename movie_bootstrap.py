@@ -0,0 +1,197 @@
+
+# coding: utf-8
+
+# # Bootstrap Confidence Intervals
+
+# The notebook reports Pearson r values and group means (GroupMean_by_Genres) as point estimates only. The functions below
+# add bootstrap confidence intervals (percentile and BCa) next to every figure.
+#
+# The resamples are drawn as blocks of index matrices (one row of movie positions per replicate) and the statistics of a
+# whole block are computed at once with numpy. Blocks are spread over a process pool; every block has its own seed
+# spawned from a single SeedSequence, so the replicates are the same whatever the number of workers.
+
+import concurrent.futures
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+import movie_engine
+
+
+GROUP_METRICS=['budget_adj', 'revenue_adj', 'ROI(%)']
+
+
+# data shared with the statistics of the replicate blocks, set once per worker process by set_block_data
+
+_block_data={}
+
+
+def set_block_data(data):
+    _block_data.clear()
+    _block_data.update(data)
+
+
+# define a function that takes in a (replicates x movies x columns) array and the column positions of the pairs and
+# returns the Pearson r of every pair for every replicate. As in Series.corr, a pair only uses the movies where both
+# values are finite
+
+def correlation_statistics(samples, pairs):
+    finite=np.isfinite(samples)
+    statistics=[]
+    for x, y in pairs:
+        both=finite[:, :, x] & finite[:, :, y]
+        n=both.sum(axis=1)[:, None]
+        sample_x, sample_y=np.where(both, samples[:, :, x], 0.0), np.where(both, samples[:, :, y], 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            centred_x=np.where(both, sample_x-sample_x.sum(axis=1)[:, None]/n, 0.0)
+            centred_y=np.where(both, sample_y-sample_y.sum(axis=1)[:, None]/n, 0.0)
+            statistics.append((centred_x*centred_y).sum(axis=1)/np.sqrt((centred_x*centred_x).sum(axis=1)*
+                                                                       (centred_y*centred_y).sum(axis=1)))
+    return np.stack(statistics, axis=1)
+
+
+# define a function that takes in the group codes and metric values of the resampled movies (replicates x movies) and the
+# number of groups and returns the mean of every (metric, group) for every replicate. As in groupby().mean(), missing
+# (and infinite) values are left out of the mean of their metric
+
+def group_mean_statistics(codes, samples, n_groups):
+    n_replicates=len(codes)
+    flat=(codes+n_groups*np.arange(n_replicates)[:, None]).ravel()
+    means=[]
+    for metric in range(samples.shape[-1]):
+        values=samples[:, :, metric].ravel()
+        finite=np.isfinite(values)
+        counts=np.bincount(flat[finite], minlength=n_replicates*n_groups)
+        sums=np.bincount(flat[finite], weights=values[finite], minlength=n_replicates*n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means.append((sums/counts).reshape(n_replicates, n_groups))
+    return np.concatenate(means, axis=1)
+
+
+# define a function that takes in a seed sequence and a number of replicates and returns the statistics of that block of
+# bootstrap replicates for the data set by set_block_data
+
+def replicate_block(seed, n_replicates):
+    values=_block_data['values']
+    indices=np.random.default_rng(seed).integers(0, len(values), size=(n_replicates, len(values)))
+    if _block_data['kind'] == 'correlation':
+        return correlation_statistics(values[indices], _block_data['pairs'])
+    return group_mean_statistics(_block_data['codes'][indices], values[indices], _block_data['n_groups'])
+
+
+# define a function that takes in the data of the statistics, the number of replicates, a seed, the block size and the
+# number of worker processes and returns the (replicates x statistics) array of the bootstrap replicates
+
+def bootstrap_replicates(data, n_resamples, seed, block_size, workers):
+    sizes=[block_size]*(n_resamples//block_size)+([n_resamples % block_size] if n_resamples % block_size else [])
+    seeds=np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers is not None and workers <= 1:
+        set_block_data(data)
+        return np.concatenate([replicate_block(block_seed, size) for block_seed, size in zip(seeds, sizes)])
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=set_block_data,
+                                                initargs=(data,)) as executor:
+        return np.concatenate(list(executor.map(replicate_block, seeds, sizes)))
+
+
+# define a function that takes in the bootstrap replicates, the point estimates, the jackknife (leave one out) estimates
+# and a confidence level and returns the percentile and BCa (bias corrected and accelerated) intervals of every statistic
+
+def confidence_intervals(replicates, estimates, jackknife, confidence=0.95):
+    alpha=(1-confidence)/2
+    valid=np.isfinite(replicates)
+    # statistics without any finite replicate (e.g. a group without any value of a metric) get missing intervals
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        percentile=np.nanpercentile(replicates, [100*alpha, 100*(1-alpha)], axis=0)
+
+        # bias correction from the share of replicates below the estimate, acceleration from the jackknife skewness
+        below=((replicates < estimates) & valid).sum(axis=0)/valid.sum(axis=0)
+        bias=special.ndtri(np.clip(below, 1.0/len(replicates), 1-1.0/len(replicates)))
+        deviations=np.nanmean(jackknife, axis=0)-jackknife
+        acceleration=np.nansum(deviations**3, axis=0)/(6*np.nansum(deviations**2, axis=0)**1.5)
+        acceleration=np.where(np.isfinite(acceleration), acceleration, 0.0)
+        bca=[]
+        for quantile in [alpha, 1-alpha]:
+            z=special.ndtri(quantile)
+            adjusted=special.ndtr(bias+(bias+z)/(1-acceleration*(bias+z)))
+            bca.append(np.array([np.nanquantile(replicates[:, number], adjusted[number])
+                                 if np.isfinite(adjusted[number]) and valid[:, number].any() else np.nan
+                                 for number in range(replicates.shape[1])]))
+    return {'percentile_low': percentile[0], 'percentile_high': percentile[1], 'bca_low': bca[0], 'bca_high': bca[1]}
+
+
+# define a function that takes in a dataframe and a list of column pairs and returns a dataframe with the Pearson r of
+# every pair and its bootstrap confidence intervals
+
+def bootstrap_correlations(frame, pairs=movie_engine.CORRELATIONS, n_resamples=2000, confidence=0.95, seed=0,
+                           block_size=200, workers=None):
+    columns=sorted(set(column for pair in pairs for column in pair))
+    values=frame[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    values=np.where(np.isfinite(values), values, np.nan)
+    # r does not depend on the location and scale of the columns, standardizing (over the finite values) keeps the
+    # moment sums well conditioned
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        scale=np.nanstd(values, axis=0)
+        values=(values-np.nanmean(values, axis=0))/np.where(scale > 0, scale, 1.0)
+    positions=[(columns.index(x), columns.index(y)) for x, y in pairs]
+    estimates=correlation_statistics(values[None], positions)[0]
+
+    # leave one out Pearson r of every pair from the moment sums over the movies where both values are finite; leaving
+    # out any other movie does not change r
+    jackknife=[]
+    for x, y in positions:
+        both=np.isfinite(values[:, x]) & np.isfinite(values[:, y])
+        vx, vy=np.where(both, values[:, x], 0.0), np.where(both, values[:, y], 0.0)
+        n=both.sum()-both
+        sx, sy=vx.sum()-vx, vy.sum()-vy
+        sxx, syy=(vx**2).sum()-vx**2, (vy**2).sum()-vy**2
+        sxy=(vx*vy).sum()-vx*vy
+        with np.errstate(invalid='ignore', divide='ignore'):
+            jackknife.append((n*sxy-sx*sy)/np.sqrt((n*sxx-sx*sx)*(n*syy-sy*sy)))
+    jackknife=np.stack(jackknife, axis=1)
+
+    data={'kind': 'correlation', 'values': values, 'pairs': positions}
+    replicates=bootstrap_replicates(data, n_resamples, seed, block_size, workers)
+    intervals=confidence_intervals(replicates, estimates, jackknife, confidence)
+
+    result=pd.DataFrame({'x': [x for x, y in pairs], 'y': [y for x, y in pairs], 'r': estimates})
+    for name, interval in intervals.items():
+        result[name]=interval
+    return result
+
+
+# define a function that takes in a dataframe, the column to group by and the metrics and returns a dataframe with the mean
+# of every metric per group (as GroupMean_by_Genres) and its bootstrap confidence intervals
+
+def bootstrap_group_means(frame, by='genres', metrics=GROUP_METRICS, n_resamples=2000, confidence=0.95, seed=0,
+                          block_size=200, workers=None):
+    codes, groups=pd.factorize(frame[by], sort=True)
+    values=frame[list(metrics)].to_numpy(dtype=np.float64, na_value=np.nan)
+    n_groups=len(groups)
+    estimates=group_mean_statistics(codes[None], values[None], n_groups)[0]
+
+    # leaving out a movie only changes the mean of its own group: (sum - value)/(count - 1) over the finite values (a
+    # movie without a finite value leaves the mean unchanged)
+    finite=np.isfinite(values)
+    counts=np.stack([np.bincount(codes[finite[:, metric]], minlength=n_groups) for metric in range(len(metrics))])
+    jackknife=np.tile(estimates, (len(values), 1))
+    for metric in range(len(metrics)):
+        value=np.where(finite[:, metric], values[:, metric], 0.0)
+        sums=np.bincount(codes, weights=value, minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            jackknife[np.arange(len(values)), metric*n_groups+codes]=((sums[codes]-value)/
+                                                                      (counts[metric][codes]-finite[:, metric]))
+
+    data={'kind': 'group_mean', 'values': values, 'codes': codes, 'n_groups': n_groups}
+    replicates=bootstrap_replicates(data, n_resamples, seed, block_size, workers)
+    intervals=confidence_intervals(replicates, estimates, jackknife, confidence)
+
+    result=pd.DataFrame({by: np.tile(np.asarray(groups, dtype=object), len(metrics)),
+                         'metric': np.repeat(list(metrics), n_groups), 'mean': estimates,
+                         'movies': counts.ravel()})
+    for name, interval in intervals.items():
+        result[name]=interval
+    return result
@@ -0,0 +1,272 @@
+
+# coding: utf-8
+
+# # Execution Engines for the Data Wrangling Pipeline
+
+# The data wrangling of Project_Movie_Data_Analysis.py runs on pandas object columns. The same stages are written below
+# once per execution engine:
+# - PandasEngine: the notebook's pandas operations
+# - ArrowEngine: pyarrow compute kernels (string kernels for the pipe characters, group_by for the aggregates)
+#
+# run_pipeline drives either engine through the same stages and only hands the results over to pandas at the very end.
+# compare_engines runs both engines on the same data and verifies that they agree.
+
+import numpy as np
+import pandas as pd
+
+
+# columns that are not used in the analysis (see the Data Wrangling section of the notebook)
+
+UNUSED_COLUMNS=['budget', 'revenue', 'homepage', 'tagline', 'keywords', 'overview']
+
+# columns containing pipe characters, only the first ("dominant") string is kept for the analysis
+
+PIPE_COLUMNS=['director', 'cast', 'genres', 'production_companies']
+
+# columns for which a value of 0 is regarded as unreliable data
+
+NONZERO_COLUMNS=['runtime', 'budget_adj', 'revenue_adj']
+
+# personal minimum values used for the analysis (strictly greater than)
+
+MINIMUMS=[('runtime', 2), ('vote_count', 10), ('budget_adj', 10000)]
+
+# metrics averaged per genre and per release year
+
+GENRE_METRICS=['budget_adj', 'revenue_adj', 'ROI(%)']
+YEAR_METRICS=['popularity', 'vote_count', 'vote_average', 'budget_adj', 'revenue_adj', 'ROI(%)']
+
+# Pearson r reported in the notebook for the movies of the analysis
+
+CORRELATIONS=[('popularity', 'vote_count'), ('popularity', 'vote_average'), ('budget_adj', 'popularity'),
+              ('popularity', 'revenue_adj'), ('budget_adj', 'revenue_adj'), ('ROI(%)', 'popularity'),
+              ('ROI(%)', 'budget_adj')]
+
+
+# define a function that takes in a series of names and returns it without the missing values, the empty strings and the
+# "No Data" placeholders
+
+def drop_no_data(names):
+    return names[names.notna() & (names != '') & (names != 'No Data')]
+
+
+# define a function that takes in a series of pipe separated strings and returns a series with one row per string (the
+# index of a row is repeated for each of its strings), stripped of surrounding spaces and without missing values, empty
+# strings and "No Data"
+
+def explode_pipes(values):
+    return drop_no_data(values.astype(object).str.split('|').explode().str.strip())
+
+
+class PandasEngine(object):
+
+    name='pandas'
+
+    def read_csv(self, path):
+        return pd.read_csv(path)
+
+    def from_pandas(self, frame):
+        return frame
+
+    def drop_duplicates(self, frame, subset):
+        return frame.drop_duplicates(subset=subset)
+
+    def delete_columns(self, frame, columns):
+        return frame.drop([column for column in columns if column in frame.columns], axis=1)
+
+    def remove_zeros(self, frame, columns):
+        return frame[(frame[columns] != 0).all(axis=1)]
+
+    def fill_no_data(self, frame, columns):
+        return frame.fillna({column: "No Data" for column in columns})
+
+    def dominant_values(self, frame, columns):
+        frame=frame.copy()
+        for column in columns:
+            frame[column]=frame[column].str.split('|', n=1).str[0]
+        return frame
+
+    def add_roi(self, frame):
+        frame=frame.copy()
+        frame['ROI(%)']=frame['revenue_adj']/frame['budget_adj']*100
+        return frame
+
+    def remove_no_data(self, frame, columns):
+        keep=np.ones(len(frame), dtype=bool)
+        for column in columns:
+            keep&=~frame[column].str.contains("No Data", regex=False).to_numpy(dtype=bool)
+        return frame[keep]
+
+    def set_minimum(self, frame, column, minimum):
+        return frame[frame[column] > minimum]
+
+    def group_mean(self, frame, key, metrics):
+        return frame.groupby([key], as_index=False)[metrics].mean()
+
+    def value_counts(self, frame, column):
+        return frame[column].value_counts()
+
+    def num_rows(self, frame):
+        return len(frame)
+
+    def to_pandas(self, frame):
+        return frame.reset_index(drop=True)
+
+
+class ArrowEngine(object):
+
+    name='arrow'
+
+    def __init__(self):
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+        self.pa=pyarrow
+        self.pc=pyarrow.compute
+        self.csv=pyarrow.csv
+
+    # empty cells are read as nulls (as pandas does) so that fill_no_data can replace them
+    def read_csv(self, path):
+        return self.csv.read_csv(path, convert_options=self.csv.ConvertOptions(strings_can_be_null=True))
+
+    def from_pandas(self, frame):
+        return self.pa.Table.from_pandas(frame, preserve_index=False)
+
+    # keep the first row of every (subset) group, in the original row order
+    def drop_duplicates(self, table, subset):
+        pa, pc=self.pa, self.pc
+        rows=table.select(subset).append_column('__row', pa.array(np.arange(table.num_rows)))
+        first=rows.group_by(subset, use_threads=False).aggregate([('__row', 'min')]).column('__row_min')
+        return table.take(pc.take(first, pc.sort_indices(first)))
+
+    def delete_columns(self, table, columns):
+        return table.drop_columns([column for column in columns if column in table.column_names])
+
+    def remove_zeros(self, table, columns):
+        pc=self.pc
+        keep=pc.fill_null(pc.not_equal(table[columns[0]], 0), True)
+        for column in columns[1:]:
+            keep=pc.and_(keep, pc.fill_null(pc.not_equal(table[column], 0), True))
+        return table.filter(keep)
+
+    def fill_no_data(self, table, columns):
+        for column in columns:
+            if column in table.column_names:
+                position=table.column_names.index(column)
+                table=table.set_column(position, column, self.pc.fill_null(table[column], "No Data"))
+        return table
+
+    def dominant_values(self, table, columns):
+        pc=self.pc
+        for column in columns:
+            position=table.column_names.index(column)
+            first=pc.list_element(pc.split_pattern(table[column], '|', max_splits=1), 0)
+            table=table.set_column(position, column, first)
+        return table
+
+    def add_roi(self, table):
+        pc=self.pc
+        budget=pc.cast(table['budget_adj'], self.pa.float64())
+        revenue=pc.cast(table['revenue_adj'], self.pa.float64())
+        return table.append_column('ROI(%)', pc.multiply(pc.divide(revenue, budget), 100))
+
+    def remove_no_data(self, table, columns):
+        pc=self.pc
+        keep=None
+        for column in columns:
+            column_keep=pc.invert(pc.fill_null(pc.match_substring(table[column], "No Data"), False))
+            keep=column_keep if keep is None else pc.and_(keep, column_keep)
+        return table.filter(keep)
+
+    def set_minimum(self, table, column, minimum):
+        return table.filter(self.pc.fill_null(self.pc.greater(table[column], minimum), False))
+
+    # pandas sorts the groups by key, arrow returns them in order of appearance
+    def group_mean(self, table, key, metrics):
+        grouped=table.group_by(key, use_threads=False).aggregate([(metric, 'mean') for metric in metrics])
+        grouped=grouped.select([key]+[metric+'_mean' for metric in metrics]).rename_columns([key]+metrics)
+        return grouped.sort_by(key)
+
+    # counts in descending order, ties in order of first appearance (as pandas value_counts)
+    def value_counts(self, table, column):
+        counts=self.pc.value_counts(table[column])
+        order=self.pa.table({'counts': counts.field('counts'),
+                             'position': np.arange(len(counts))}).sort_by([('counts', 'descending'),
+                                                                           ('position', 'ascending')])
+        values=counts.field('values').take(order['position'])
+        return pd.Series(order['counts'].to_numpy(), index=pd.Index(values.to_pylist(), name=column), name='count')
+
+    def num_rows(self, table):
+        return table.num_rows
+
+    # hand the table over to pandas, numeric columns without nulls are not copied
+    def to_pandas(self, table):
+        if isinstance(table, pd.DataFrame) or isinstance(table, pd.Series):
+            return table
+        return table.to_pandas(split_blocks=True)
+
+
+ENGINES={'pandas': PandasEngine, 'arrow': ArrowEngine}
+
+
+# define a function that takes in the name of an engine and returns an instance of that engine
+
+def get_engine(name):
+    if name not in ENGINES:
+        raise ValueError("Unknown engine {!r}, expected one of {}".format(name, sorted(ENGINES)))
+    return ENGINES[name]()
+
+
+# define a function that takes in an engine and a data source (path to a csv file or a pandas dataframe) and runs the data
+# wrangling and the main aggregates with that engine. Returns a dictionary with:
+# - movies: the dataframe the analysis is done for (movie_database_analysis_df in the notebook)
+# - genres: average budget, revenue and ROI per genre (GroupMean_by_Genres)
+# - release_year: average metrics per release year (GroupMean_by_ReleaseYear)
+# - production_companies: number of movies per production company (production_companies_count)
+# - original_movies: number of movies of the data source, before any wrangling
+
+def run_pipeline(engine, source, minimums=MINIMUMS):
+    if isinstance(engine, str):
+        engine=get_engine(engine)
+    if isinstance(source, pd.DataFrame):
+        data=engine.from_pandas(source)
+    else:
+        data=engine.read_csv(source)
+    original_movies=engine.num_rows(data)
+
+    data=engine.drop_duplicates(data, ['imdb_id', 'popularity'])
+    data=engine.delete_columns(data, UNUSED_COLUMNS)
+    data=engine.remove_zeros(data, NONZERO_COLUMNS)
+    data=engine.fill_no_data(data, PIPE_COLUMNS)
+    data=engine.dominant_values(data, PIPE_COLUMNS)
+    data=engine.add_roi(data)
+    data=engine.remove_no_data(data, PIPE_COLUMNS)
+    for column, minimum in minimums:
+        data=engine.set_minimum(data, column, minimum)
+
+    return {'movies': engine.to_pandas(data),
+            'genres': engine.to_pandas(engine.group_mean(data, 'genres', GENRE_METRICS)),
+            'release_year': engine.to_pandas(engine.group_mean(data, 'release_year', YEAR_METRICS)),
+            'production_companies': engine.value_counts(data, 'production_companies'),
+            'original_movies': original_movies}
+
+
+# define a function that takes in a data source and runs the pipeline with every engine listed (a csv file is read by each
+# engine's own reader). Raises an AssertionError if the results of an engine differ from the results of the first engine,
+# otherwise returns the results per engine
+
+def compare_engines(source, engines=('pandas', 'arrow'), rtol=1e-9):
+    results={name: run_pipeline(name, source) for name in engines}
+    reference=results[engines[0]]
+    for name in engines[1:]:
+        for key, expected in reference.items():
+            actual=results[name][key]
+            if not isinstance(expected, (pd.Series, pd.DataFrame)):
+                assert actual == expected, "{} {}: {!r} != {!r}".format(name, key, actual, expected)
+            elif isinstance(expected, pd.Series):
+                pd.testing.assert_series_equal(actual.astype(expected.dtype), expected, check_index_type=False,
+                                               check_names=False, rtol=rtol, obj="{} {}".format(name, key))
+            else:
+                pd.testing.assert_frame_equal(actual.astype(expected.dtypes.to_dict()), expected, check_dtype=False,
+                                              rtol=rtol, obj="{} {}".format(name, key))
+    return results
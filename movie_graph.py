@@ -0,0 +1,110 @@
+
+# coding: utf-8
+
+# # Cast & Crew Collaboration Graph
+
+# The main analysis only keeps the "dominant" (first) actor of every movie. The functions below use every pipe separated
+# cast member and director instead, and build a sparse co-occurrence graph of who worked with whom. Every person is coded
+# as an integer node so that degree, reach and connected components are computed with sparse linear algebra rather than
+# with Python loops over edges.
+
+import collections
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+import movie_engine
+
+
+# container returned by build_collaboration_graph:
+# - people: index of person names, the position of a name is its integer node code
+# - cast / director: sparse (movies x people) incidence matrices, 1 where a person is credited on a movie
+# - adjacency: sparse (people x people) matrix, the number of movies two people share (actor-actor and actor-director)
+
+CollaborationGraph=collections.namedtuple('CollaborationGraph', ['people', 'cast', 'director', 'adjacency'])
+
+
+# define a function that takes in a dataframe and the name of a pipe separated column and returns two arrays of the same
+# length: the row position of the movie and the name of every person credited on that movie
+
+def explode_credits(frame, column):
+    credits=movie_engine.explode_pipes(frame[column].reset_index(drop=True))
+    return credits.index.to_numpy(dtype=np.int64), credits.to_numpy(dtype=object)
+
+
+# define a function that takes in the movie positions and people codes of the credits and returns a sparse incidence
+# matrix (movies x people). Duplicated credits of the same person on the same movie are only counted once
+
+def incidence_matrix(movie_rows, people_codes, n_movies, n_people):
+    incidence=sparse.csr_matrix((np.ones(len(movie_rows), dtype=np.float64), (movie_rows, people_codes)),
+                                shape=(n_movies, n_people))
+    incidence.data[:]=1.0
+    return incidence
+
+
+# define a function that takes in a dataframe with the pipe separated cast and director columns and returns a
+# CollaborationGraph. Names found in both columns (actors who also direct) share a single node
+
+def build_collaboration_graph(frame, cast_column='cast', director_column='director'):
+    cast_rows, cast_names=explode_credits(frame, cast_column)
+    director_rows, director_names=explode_credits(frame, director_column)
+
+    codes, people=pd.factorize(np.concatenate([cast_names, director_names]))
+    n_movies=len(frame)
+    n_people=len(people)
+
+    cast=incidence_matrix(cast_rows, codes[:len(cast_names)], n_movies, n_people)
+    director=incidence_matrix(director_rows, codes[len(cast_names):], n_movies, n_people)
+
+    # co-occurrences over the union of the credits, so that a person both acting in and directing a movie links to
+    # the others of that movie once only. Pairs of people who only direct a movie (co-directors) are not linked by it
+    credited=cast + director
+    credited.data[:]=1.0
+    director_only=(director - director.multiply(cast)).tocsr()
+    director_only.eliminate_zeros()
+    adjacency=(credited.T @ credited - director_only.T @ director_only).tocsr()
+    adjacency.setdiag(0)
+    adjacency.eliminate_zeros()
+
+    return CollaborationGraph(pd.Index(people, name='person'), cast, director, adjacency)
+
+
+# define a function that takes in a CollaborationGraph and returns an array with the connected component label of every
+# person (two people are in the same component if a chain of shared movies links them)
+
+def connected_components(graph):
+    n_components, labels=csgraph.connected_components(graph.adjacency, directed=False)
+    return labels
+
+
+# define a function that takes in a CollaborationGraph, the dataframe it was built from and a list of metric columns and
+# returns a dataframe indexed by person with:
+# - credits: number of movies the person is credited on
+# - degree: number of distinct collaborators
+# - shared_credits: number of (collaborator, movie) pairs, i.e. the weighted degree
+# - <metric>: sum of the metric over the person's own movies
+# - <metric>_reach: sum of the metric over the movies of all the person's collaborators (weighted by shared movies)
+# - component / component_size: connected component label and the number of people in that component
+
+def collaboration_metrics(graph, frame, metrics=('revenue_adj', 'popularity')):
+    credited=(graph.cast + graph.director)
+    credited.data[:]=1.0
+    adjacency=graph.adjacency
+
+    values=frame.loc[:, list(metrics)].fillna(0).to_numpy(dtype=np.float64)
+    totals=np.asarray(credited.T @ values)
+    reach=np.asarray(adjacency @ totals)
+
+    labels=connected_components(graph)
+
+    result=pd.DataFrame({'credits': np.asarray(credited.sum(axis=0)).ravel().astype(np.int64),
+                         'degree': np.diff(adjacency.indptr),
+                         'shared_credits': np.asarray(adjacency.sum(axis=1)).ravel()}, index=graph.people)
+    for position, metric in enumerate(metrics):
+        result[metric]=totals[:, position]
+        result[metric+'_reach']=reach[:, position]
+    result['component']=labels
+    result['component_size']=np.bincount(labels)[labels]
+    return result
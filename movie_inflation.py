@@ -0,0 +1,101 @@
+
+# coding: utf-8
+
+# # Inflation Re-Adjustment from the Raw Budget & Revenue
+
+# The notebook relies on the precomputed budget_adj and revenue_adj columns (whose base year and inflation rates are
+# unknown, see the Conclusion) and drops the raw budget and revenue columns. InflationAdjuster restates the raw budget and
+# revenue of every movie in the currency and prices of any base year from a local price table:
+# - date: date of the observation (e.g. monthly)
+# - cpi: consumer price index at that date
+# - fx (optional): units of the target currency for one US dollar at that date
+#
+# The price index at the release of every movie is found with one as-of merge (latest observation at or before the
+# release date) for the whole catalogue. It does not depend on the base year, so it is computed once; restating the
+# catalogue in a base year is then a single vectorized multiplication, and its result is cached per base year.
+
+import numpy as np
+import pandas as pd
+
+import movie_timeseries
+
+
+# define a function that takes in the path of a csv price table (date, cpi and optionally fx columns) and returns it
+# sorted by date, ready for the as-of merge
+
+def read_price_table(path):
+    return prepare_price_table(pd.read_csv(path))
+
+
+# define a function that takes in a price table dataframe and returns it with a datetime64 date column, sorted by date
+
+def prepare_price_table(prices):
+    prices=prices.copy()
+    prices['date']=pd.to_datetime(prices['date'])
+    if 'fx' not in prices.columns:
+        prices['fx']=1.0
+    prices=prices.dropna(subset=['date', 'cpi']).sort_values('date', kind='stable')
+    return prices[['date', 'cpi', 'fx']].reset_index(drop=True)
+
+
+# define a function that takes in a dataframe and returns the release date of every movie, movies without a valid
+# release_date are placed in the middle (July 1st) of their release year
+
+def release_timestamps(frame):
+    dates=movie_timeseries.release_dates(frame)
+    if 'release_year' in frame.columns:
+        mid_year=pd.to_datetime(pd.DataFrame({'year': frame['release_year'], 'month': 7, 'day': 1}), errors='coerce')
+        dates=dates.fillna(mid_year)
+    return dates
+
+
+# define a function that takes in the investment and the revenue and returns the ROI in % (as return_investment in the
+# notebook)
+
+def return_investment(investment, revenue):
+    ROI=revenue/investment*100
+    return ROI
+
+
+class InflationAdjuster(object):
+
+    def __init__(self, movies, prices):
+        self.movies=movies
+        self.prices=prepare_price_table(prices) if isinstance(prices, pd.DataFrame) else read_price_table(prices)
+        self.cache={}
+
+        # price index at the release of every movie, one as-of merge for the whole catalogue
+        dates=release_timestamps(movies)
+        order=pd.DataFrame({'date': dates.to_numpy(), 'position': np.arange(len(movies))})
+        order=order[order['date'].notna()].sort_values('date', kind='stable')
+        merged=pd.merge_asof(order, self.prices[['date', 'cpi']], on='date', direction='backward')
+        self.release_cpi=np.full(len(movies), np.nan)
+        self.release_cpi[merged['position'].to_numpy()]=merged['cpi'].to_numpy(dtype=np.float64)
+
+    # average price index and exchange rate over the base year
+    def base_prices(self, base_year):
+        year=self.prices[self.prices['date'].dt.year == base_year]
+        if len(year) == 0:
+            raise ValueError("The price table has no observation for the base year {}".format(base_year))
+        return year['cpi'].mean(), year['fx'].mean()
+
+    # return the movies with budget_adj, revenue_adj and ROI(%) restated in the prices (and currency) of the base year.
+    # Movies released before the first observation of the price table get missing values
+    def adjust(self, base_year):
+        if base_year not in self.cache:
+            base_cpi, base_fx=self.base_prices(base_year)
+            factor=base_cpi/self.release_cpi*base_fx
+            adjusted=self.movies.copy()
+            adjusted['budget_adj']=self.movies['budget'].to_numpy(dtype=np.float64)*factor
+            adjusted['revenue_adj']=self.movies['revenue'].to_numpy(dtype=np.float64)*factor
+            with np.errstate(invalid='ignore', divide='ignore'):
+                adjusted['ROI(%)']=return_investment(adjusted['budget_adj'], adjusted['revenue_adj'])
+            self.cache[base_year]=adjusted
+        return self.cache[base_year]
+
+
+# define a function that takes in a dataframe with the raw budget and revenue, a price table (dataframe or csv path) and
+# a base year and returns the dataframe restated in that base year
+
+def readjust(movies, prices, base_year):
+    return InflationAdjuster(movies, prices).adjust(base_year)
@@ -0,0 +1,159 @@
+
+# coding: utf-8
+
+# # Multi-File and Compressed Ingestion
+
+# The notebook reads a single uncompressed tmdb-movies.csv. read_movies accepts a glob of csv dumps (per year, per source,
+# ...), plain or compressed with gzip, bz2, xz or zstd, decompresses them as streams and parses them concurrently in a
+# thread (or process) pool. Every file is reconciled against the declared MOVIE_SCHEMA (renamed columns, missing columns,
+# extra columns, dtypes) so that the files can be stacked into one dataframe, ready for the duplicate removal of the data
+# wrangling. iter_movie_chunks returns the same data as a stream of chunks instead.
+
+import bz2
+import concurrent.futures
+import glob
+import gzip
+import lzma
+import os
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# columns of tmdb-movies.csv and their dtypes
+
+MOVIE_SCHEMA={'id': 'Int64', 'imdb_id': object, 'popularity': 'float64', 'budget': 'Int64', 'revenue': 'Int64',
+              'original_title': object, 'cast': object, 'homepage': object, 'director': object, 'tagline': object,
+              'keywords': object, 'overview': object, 'runtime': 'Int64', 'genres': object,
+              'production_companies': object, 'release_date': object, 'vote_count': 'Int64', 'vote_average': 'float64',
+              'release_year': 'Int64', 'budget_adj': 'float64', 'revenue_adj': 'float64'}
+
+# decompression per file extension (zstd needs the zstandard package), any other file is read as plain text
+
+def open_zstd(path):
+    import zstandard
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def open_plain(path):
+    return open(path, 'rb')
+
+
+OPENERS={'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open, '.zst': open_zstd, '.zstd': open_zstd}
+
+
+# define a function that takes in a glob pattern (or a list of patterns / paths) and returns the sorted list of files
+
+def expand_paths(patterns):
+    if isinstance(patterns, str):
+        patterns=[patterns]
+    paths=[]
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+    if not paths:
+        raise FileNotFoundError("No file matches {}".format(patterns))
+    return paths
+
+
+# define a function that takes in the path of a file and returns a binary stream of its decompressed content
+
+def open_stream(path):
+    return OPENERS.get(os.path.splitext(path)[1].lower(), open_plain)(path)
+
+
+# define a function that takes in a dataframe read from one file, the schema and a dictionary of column aliases (name in the
+# file -> name in the schema) and returns the dataframe with exactly the columns of the schema, in the schema's order and
+# with the schema's dtypes. Missing columns are filled with missing values, extra columns are dropped
+
+def reconcile_schema(frame, schema=MOVIE_SCHEMA, aliases=None):
+    frame=frame.rename(columns=lambda column: str(column).strip())
+    if aliases:
+        frame=frame.rename(columns=aliases)
+    frame=frame.reindex(columns=list(schema))
+    for column, dtype in schema.items():
+        if dtype is object:
+            frame[column]=frame[column].astype(object).where(frame[column].notna(), np.nan)
+        else:
+            frame[column]=pd.to_numeric(frame[column], errors='coerce').astype(dtype)
+    return frame
+
+
+# define a function that takes in the path of a file and returns its reconciled dataframe (or the list of its reconciled
+# chunks when chunksize is given)
+
+def read_movie_file(path, schema=MOVIE_SCHEMA, aliases=None, chunksize=None):
+    with open_stream(path) as stream:
+        if chunksize is None:
+            return reconcile_schema(pd.read_csv(stream), schema, aliases)
+        return [reconcile_schema(chunk, schema, aliases) for chunk in pd.read_csv(stream, chunksize=chunksize)]
+
+
+# define a function that takes in the name of an executor ('thread' or 'process') and a number of workers and returns a
+# concurrent.futures executor
+
+def make_executor(executor, workers):
+    if executor == 'process':
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    if executor == 'thread':
+        return concurrent.futures.ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+    raise ValueError("Unknown executor {!r}, expected 'thread' or 'process'".format(executor))
+
+
+# define a function that takes in a glob of csv files and returns a single dataframe with the movies of all the files
+# (files are stacked in sorted path order)
+
+def read_movies(patterns, schema=MOVIE_SCHEMA, aliases=None, workers=None, executor='thread'):
+    paths=expand_paths(patterns)
+    if len(paths) == 1 or workers == 1:
+        frames=[read_movie_file(path, schema, aliases) for path in paths]
+    else:
+        with make_executor(executor, workers) as pool:
+            frames=list(pool.map(read_movie_file, paths, [schema]*len(paths), [aliases]*len(paths)))
+    return pd.concat(frames, ignore_index=True)
+
+
+# define a function that takes in a glob of csv files and returns a generator of reconciled chunks of at most chunksize
+# movies. The files are parsed concurrently by a pool of threads, at most max_pending chunks wait in memory, and chunks
+# are yielded as soon as they are parsed (the order of the chunks between files is therefore not fixed)
+
+def iter_movie_chunks(patterns, chunksize=100000, schema=MOVIE_SCHEMA, aliases=None, workers=None, max_pending=8):
+    paths=expand_paths(patterns)
+    chunks=queue.Queue(maxsize=max_pending)
+    finished=object()
+    stop=threading.Event()
+
+    def parse(path):
+        try:
+            with open_stream(path) as stream:
+                for chunk in pd.read_csv(stream, chunksize=chunksize):
+                    if stop.is_set():
+                        return
+                    chunks.put(reconcile_schema(chunk, schema, aliases))
+        except Exception as error:
+            chunks.put(error)
+        finally:
+            chunks.put(finished)
+
+    pool=concurrent.futures.ThreadPoolExecutor(max_workers=workers or min(len(paths), os.cpu_count() or 1))
+    futures=[pool.submit(parse, path) for path in paths]
+    try:
+        remaining=len(paths)
+        while remaining:
+            chunk=chunks.get()
+            if chunk is finished:
+                remaining-=1
+            elif isinstance(chunk, Exception):
+                raise chunk
+            else:
+                yield chunk
+    finally:
+        # stop the threads still parsing, emptying the queue so that none of them stays blocked on a full queue
+        stop.set()
+        while not all(future.done() for future in futures):
+            try:
+                chunks.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        pool.shutdown()
@@ -0,0 +1,92 @@
+
+# coding: utf-8
+
+# # Leaderboards with Minimum Support
+
+# In the notebook a leaderboard takes several steps (value_counts, keeping the companies with at least 10 movies, isin,
+# groupby().mean(), sort_values) and the directors leaderboard (Groupby_Directors.nlargest(10, 'revenue_adj')) has no
+# minimum number of movies at all. Leaderboard computes the number of movies and the sum of every metric per director,
+# production company, genre or cast member in one grouped pass. Any number of top-k tables (per metric, per minimum support,
+# ranked by mean, count or Bayesian average) are then read from that single aggregate.
+#
+# The Bayesian average shrinks the mean of an entity with few movies towards the mean of the whole data set:
+#
+# $$bayes=\frac{C \times m + \sum x}{C + n}$$
+#
+# where n is the number of movies of the entity with a finite value of the metric, m the overall mean of the metric and C
+# the prior weight (by default the minimum support).
+
+import numpy as np
+import pandas as pd
+
+import movie_engine
+
+
+LEADERBOARD_ENTITIES=['director', 'production_companies', 'genres', 'cast']
+
+LEADERBOARD_METRICS=['popularity', 'vote_average', 'budget_adj', 'revenue_adj', 'ROI(%)']
+
+
+class Leaderboard(object):
+
+    # with explode=True, every pipe separated value of the entity column is credited with the movie (e.g. the full cast
+    # instead of the dominant actor)
+    def __init__(self, frame, entity, metrics=LEADERBOARD_METRICS, explode=False):
+        self.entity=entity
+        self.metrics=list(metrics)
+
+        names=frame[entity].reset_index(drop=True)
+        names=movie_engine.explode_pipes(names) if explode else movie_engine.drop_no_data(names)
+        rows=names.index.to_numpy()
+        codes, entities=pd.factorize(names.to_numpy(dtype=object))
+        values=frame[self.metrics].to_numpy(dtype=np.float64, na_value=np.nan)[rows]
+        # missing and infinite values (e.g. the ROI of a zero budget) are left out of the metric they belong to only
+        finite=np.isfinite(values)
+        values=np.where(finite, values, 0.0)
+
+        # one pass: number of movies, and number of finite values and their sum for every metric per entity
+        table={'count': np.bincount(codes, minlength=len(entities))}
+        for position, metric in enumerate(self.metrics):
+            table[metric+'_count']=np.bincount(codes[finite[:, position]], minlength=len(entities))
+            table[metric+'_sum']=np.bincount(codes, weights=values[:, position], minlength=len(entities))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                table[metric]=table[metric+'_sum']/table[metric+'_count']
+        self.table=pd.DataFrame(table, index=pd.Index(entities, name=entity))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.overall_means=pd.Series(values.sum(axis=0)/finite.sum(axis=0), index=self.metrics)
+
+    # Bayesian average of a metric for every entity
+    def bayesian_average(self, metric, prior_weight):
+        return ((prior_weight*self.overall_means[metric]+self.table[metric+'_sum'])/
+                (prior_weight+self.table[metric+'_count']))
+
+    # top k entities with at least min_support movies, ranked by 'mean', 'count' or 'bayes' (Bayesian average of the
+    # metric, prior weight defaulting to min_support)
+    def top(self, metric, k=10, min_support=10, by='bayes', prior_weight=None, ascending=False):
+        if by not in ('mean', 'bayes', 'count'):
+            raise ValueError("Unknown ranking {!r}, expected 'mean', 'bayes' or 'count'".format(by))
+        prior_weight=max(min_support, 1) if prior_weight is None else prior_weight
+        table=self.table[self.table['count'] >= min_support]
+        result=pd.DataFrame({'count': table['count'], metric: table[metric],
+                             metric+'_bayes': self.bayesian_average(metric, prior_weight)[table.index]})
+        column={'mean': metric, 'bayes': metric+'_bayes', 'count': 'count'}[by]
+        if ascending:
+            return result.nsmallest(k, column)
+        return result.nlargest(k, column)
+
+    # top k tables of several metrics, read from the same aggregate
+    def tops(self, metrics=None, k=10, min_support=10, by='bayes', prior_weight=None):
+        return {metric: self.top(metric, k, min_support, by, prior_weight) for metric in (metrics or self.metrics)}
+
+
+# define a function that takes in a column and returns True when it still holds pipe separated values
+
+def has_pipes(column):
+    return bool(column.astype(object).str.contains('|', regex=False).fillna(False).any())
+
+
+# define a function that takes in a dataframe and returns a dictionary with the Leaderboard of every entity. Columns that
+# still hold pipe separated values (e.g. the full cast) are exploded so that every name listed is credited
+
+def leaderboards(frame, entities=LEADERBOARD_ENTITIES, metrics=LEADERBOARD_METRICS):
+    return {entity: Leaderboard(frame, entity, metrics, explode=has_pipes(frame[entity])) for entity in entities}
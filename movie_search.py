@@ -0,0 +1,210 @@
+
+# coding: utf-8
+
+# # Fuzzy Title Search
+
+# In the notebook a movie can only be reached through an exact production company filter or through nlargest. TitleIndex
+# is a trigram inverted index over original_title (and the director names) that returns the closest titles to an
+# approximate name, together with their metrics.
+#
+# Every trigram (three consecutive characters) is coded as one 64 bit integer built from its three code points, so the
+# index is made of sorted numpy arrays only: the distinct trigram codes, the offset of their posting lists and the
+# documents of the posting lists. A query looks up its trigrams with a binary search and scores the documents sharing them
+# with the Dice coefficient 2*shared/(trigrams of the query + trigrams of the document).
+#
+# New movies are added as new segments (insert), segments are merged when the index is saved and the saved arrays are
+# memory mapped when the index is loaded again.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+SEARCH_FIELDS=['original_title', 'director']
+
+SEARCH_COLUMNS=['id', 'original_title', 'director', 'release_year', 'genres', 'popularity', 'vote_average',
+                'budget_adj', 'revenue_adj', 'ROI(%)']
+
+SEGMENT_FILES=['codes', 'offsets', 'documents', 'sizes']
+
+# segments are merged as soon as there are more than MAX_SEGMENTS of them
+
+MAX_SEGMENTS=8
+
+
+# define a function that takes in a series of strings and returns them in the form that is indexed: lower case, any run of
+# non alphanumeric characters replaced by one space
+
+def normalize(texts):
+    texts=pd.Series(texts, dtype=object).fillna('').astype(str)
+    return texts.str.lower().str.replace(r'[\W_]+', ' ', regex=True).str.strip()
+
+
+# define a function that takes in a series of strings and returns two arrays: the position of the string each trigram
+# comes from and the trigram code. Strings are padded with two spaces in front and one behind so that short names and
+# word starts still produce trigrams. Trigrams repeated within one string are only returned once
+
+def trigrams(texts):
+    padded=('  '+normalize(texts)+' ').tolist()
+    lengths=np.fromiter((len(text) for text in padded), dtype=np.int64, count=len(padded))
+    points=np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    owners=np.repeat(np.arange(len(padded), dtype=np.int64), lengths)
+
+    # a trigram starts at every character that has two more characters of the same string behind it
+    starts=np.flatnonzero(owners[:-2] == owners[2:]) if len(points) > 2 else np.zeros(0, dtype=np.int64)
+    codes=(points[starts] << 42) | (points[starts+1] << 21) | points[starts+2]
+    owners=owners[starts]
+
+    order=np.lexsort((codes, owners))
+    owners, codes=owners[order], codes[order]
+    distinct=np.ones(len(codes), dtype=bool)
+    distinct[1:]=(owners[1:] != owners[:-1]) | (codes[1:] != codes[:-1])
+    return owners[distinct], codes[distinct]
+
+
+# define a function that takes in the documents and trigram codes of a set of strings and the number of strings and
+# returns a segment of the index: a dictionary of the sorted distinct codes, the offsets of their posting lists, the
+# posting lists (documents sorted by code) and the number of distinct trigrams of every document
+
+def build_segment(owners, codes, n_documents, first_document=0):
+    order=np.argsort(codes, kind='stable')
+    codes, documents=codes[order], owners[order]+first_document
+    distinct, starts=np.unique(codes, return_index=True)
+    return {'codes': distinct,
+            'offsets': np.append(starts, len(codes)).astype(np.int64),
+            'documents': documents,
+            'sizes': np.bincount(owners, minlength=n_documents).astype(np.int64)}
+
+
+# define a function that takes in a list of segments and returns a single segment holding all their postings
+
+def merge_segments(segments):
+    owners=[]
+    codes=[]
+    for segment in segments:
+        counts=np.diff(segment['offsets'])
+        owners.append(np.asarray(segment['documents']))
+        codes.append(np.repeat(np.asarray(segment['codes']), counts))
+    sizes=np.concatenate([np.asarray(segment['sizes']) for segment in segments])
+    merged=build_segment(np.concatenate(owners), np.concatenate(codes), len(sizes))
+    merged['sizes']=sizes
+    return merged
+
+
+class TitleIndex(object):
+
+    def __init__(self, frame=None, fields=SEARCH_FIELDS, columns=SEARCH_COLUMNS):
+        self.fields=list(fields)
+        self.columns=list(columns)
+        self.movies=pd.DataFrame(columns=self.columns)
+        # one document per (movie, field): document d belongs to movie d // len(fields) and field d % len(fields)
+        self.segments=[]
+        self.document_sizes=None
+        if frame is not None:
+            self.insert(frame)
+
+    def __len__(self):
+        return len(self.movies)
+
+    # add the movies of a dataframe to the index
+    def insert(self, frame):
+        frame=frame.reindex(columns=self.columns).reset_index(drop=True)
+        texts=np.empty(len(frame)*len(self.fields), dtype=object)
+        for position, field in enumerate(self.fields):
+            texts[position::len(self.fields)]=frame[field].to_numpy(dtype=object)
+        owners, codes=trigrams(texts)
+        first_document=len(self.movies)*len(self.fields)
+        self.segments.append(build_segment(owners, codes, len(texts), first_document))
+        self.document_sizes=None
+        self.movies=frame if len(self.movies) == 0 else pd.concat([self.movies, frame], ignore_index=True)
+        if len(self.segments) > MAX_SEGMENTS:
+            self.compact()
+        return self
+
+    # merge all the segments into one
+    def compact(self):
+        if len(self.segments) > 1:
+            self.segments=[merge_segments(self.segments)]
+        return self
+
+    # number of shared trigrams per document for the trigram codes of a query
+    def _shared(self, codes):
+        documents=[]
+        for segment in self.segments:
+            segment_codes=segment['codes']
+            positions=np.searchsorted(segment_codes, codes)
+            found=positions < len(segment_codes)
+            found[found]=segment_codes[positions[found]] == codes[found]
+            positions=positions[found]
+            offsets=segment['offsets']
+            documents.extend(segment['documents'][offsets[position]:offsets[position+1]] for position in positions)
+        if not documents:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        # only the candidate documents are counted, nothing of the size of the corpus is allocated per query
+        return np.unique(np.concatenate(documents), return_counts=True)
+
+    # number of distinct trigrams of every document
+    def _sizes(self):
+        if self.document_sizes is None:
+            self.document_sizes=np.concatenate([np.asarray(segment['sizes']) for segment in self.segments])
+        return self.document_sizes
+
+    # return the k movies whose title (or director) is the closest to the query, with their score (1.0 for an exact
+    # match) and their metrics. Movies scoring below min_score are left out
+    def search(self, query, k=10, min_score=0.3, fields=None):
+        codes=trigrams([query])[1]
+        result=self.movies.iloc[:0].assign(score=np.zeros(0), field=np.zeros(0, dtype=object))
+        if len(codes) == 0 or not self.segments:
+            return result
+
+        documents, shared=self._shared(np.unique(codes))
+        n_fields=len(self.fields)
+        movies, field=np.divmod(documents, n_fields)
+        scores=2.0*shared/(len(codes)+self._sizes()[documents])
+        if fields is not None:
+            keep=np.isin(field, [position for position, name in enumerate(self.fields) if name in fields])
+            movies, field, scores=movies[keep], field[keep], scores[keep]
+
+        # best field per candidate movie (the first field on ties), then the k best movies
+        order=np.lexsort((field, -scores, movies))
+        movies, field, scores=movies[order], field[order], scores[order]
+        first=np.ones(len(movies), dtype=bool)
+        first[1:]=movies[1:] != movies[:-1]
+        movies, field, scores=movies[first], field[first], scores[first]
+        keep=scores >= min_score
+        movies, field, scores=movies[keep], field[keep], scores[keep]
+        # only the candidates are sorted; ties (also at the k-th place) go to the first movie
+        order=np.lexsort((movies, -scores))[:k]
+        movies, field, scores=movies[order], field[order], scores[order]
+
+        result=self.movies.iloc[movies].copy()
+        result['score']=scores
+        result['field']=np.asarray(self.fields, dtype=object)[field]
+        return result.reset_index(drop=True)
+
+    # write the index to a directory (segments are merged first). Every file is written to a temporary file that then
+    # replaces the previous one, so that an index loaded (memory mapped) from the same directory can be saved again
+    def save(self, path):
+        self.compact()
+        os.makedirs(path, exist_ok=True)
+        segment=self.segments[0] if self.segments else build_segment(np.zeros(0, dtype=np.int64),
+                                                                      np.zeros(0, dtype=np.int64), 0)
+        for name in SEGMENT_FILES:
+            target=os.path.join(path, name+'.npy')
+            with open(target+'.tmp', 'wb') as temporary:
+                np.save(temporary, np.asarray(segment[name]))
+            os.replace(target+'.tmp', target)
+        target=os.path.join(path, 'movies.pkl')
+        pd.to_pickle({'fields': self.fields, 'columns': self.columns, 'movies': self.movies}, target+'.tmp')
+        os.replace(target+'.tmp', target)
+
+    # read an index written by save. The posting arrays are memory mapped, so loading does not read them in full
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        metadata=pd.read_pickle(os.path.join(path, 'movies.pkl'))
+        index=cls(fields=metadata['fields'], columns=metadata['columns'])
+        index.movies=metadata['movies']
+        index.segments=[{name: np.load(os.path.join(path, name+'.npy'), mmap_mode=mmap_mode)
+                         for name in SEGMENT_FILES}]
+        return index
@@ -0,0 +1,140 @@
+
+# coding: utf-8
+
+# # SQLite Persistence of the Cleaned Movie Data
+
+# Filters such as production_companies_df[production_companies_df['production_companies'].isin(['Marvel Studios'])] scan
+# the whole dataframe. The functions below write the cleaned movies once into a local SQLite database together with link
+# tables holding every pipe separated genre, production company, cast member and director (not only the dominant one).
+# The release year, director, production company and genre columns are indexed, so that MovieStore answers lookups by
+# entity from an index, from any process, without reading the csv file again.
+
+import sqlite3
+
+import pandas as pd
+
+import movie_engine
+
+
+# link tables written next to the movies table: entity -> (table name, pipe separated source column, value column)
+
+LINK_TABLES={'genre': ('movie_genres', 'genres', 'genre'),
+             'company': ('movie_companies', 'production_companies', 'company'),
+             'cast': ('movie_cast', 'cast', 'actor'),
+             'director': ('movie_directors', 'director', 'director')}
+
+INDEXES=['CREATE UNIQUE INDEX IF NOT EXISTS idx_movies_id ON movies (id)',
+         'CREATE INDEX IF NOT EXISTS idx_movies_release_year ON movies (release_year)',
+         'CREATE INDEX IF NOT EXISTS idx_movies_director ON movies (director)',
+         'CREATE INDEX IF NOT EXISTS idx_movies_production_companies ON movies (production_companies)',
+         'CREATE INDEX IF NOT EXISTS idx_movies_genres ON movies (genres)',
+         'CREATE INDEX IF NOT EXISTS idx_movie_genres_genre ON movie_genres (genre, id)',
+         'CREATE INDEX IF NOT EXISTS idx_movie_companies_company ON movie_companies (company, id)',
+         'CREATE INDEX IF NOT EXISTS idx_movie_cast_actor ON movie_cast (actor, id)',
+         'CREATE INDEX IF NOT EXISTS idx_movie_directors_director ON movie_directors (director, id)']
+
+
+# define a function that takes in a dataframe, a pipe separated column and the name of the value column and returns a
+# link table (id, <value>, position) with one row per string, position 0 being the dominant string
+
+def link_table(frame, column, value):
+    link=movie_engine.explode_pipes(frame.set_index('id')[column]).rename(value).reset_index()
+    link['position']=link.groupby('id').cumcount()
+    return link
+
+
+# define a function that takes in a data source (csv file or dataframe) and the path of a database and writes the cleaned
+# movies (the same wrangling as the notebook, see movie_engine) and the link tables into the database. Existing tables
+# are replaced. Returns the number of movies written
+
+def export_sqlite(source, path, minimums=movie_engine.MINIMUMS):
+    engine=movie_engine.PandasEngine()
+    data=engine.from_pandas(source) if isinstance(source, pd.DataFrame) else engine.read_csv(source)
+
+    data=engine.drop_duplicates(data, ['imdb_id', 'popularity'])
+    # the movies table is keyed by id: rows sharing an id (e.g. with a different popularity) are kept once
+    data=engine.drop_duplicates(data, ['id'])
+    data=engine.delete_columns(data, movie_engine.UNUSED_COLUMNS)
+    data=engine.remove_zeros(data, movie_engine.NONZERO_COLUMNS)
+    data=engine.fill_no_data(data, movie_engine.PIPE_COLUMNS)
+    full_data=data
+
+    data=engine.dominant_values(data, movie_engine.PIPE_COLUMNS)
+    data=engine.add_roi(data)
+    data=engine.remove_no_data(data, movie_engine.PIPE_COLUMNS)
+    for column, minimum in minimums:
+        data=engine.set_minimum(data, column, minimum)
+    movies=engine.to_pandas(data)
+
+    full_data=full_data[full_data['id'].isin(movies['id'])]
+
+    connection=sqlite3.connect(path)
+    try:
+        with connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            movies.to_sql('movies', connection, if_exists='replace', index=False)
+            for table, column, value in LINK_TABLES.values():
+                link_table(full_data, column, value).to_sql(table, connection, if_exists='replace', index=False)
+            for statement in INDEXES:
+                connection.execute(statement)
+            connection.execute('ANALYZE')
+    finally:
+        connection.close()
+    return len(movies)
+
+
+# define a function that takes in the path of a database and returns the movies table as a dataframe
+
+def import_sqlite(path):
+    with MovieStore(path) as store:
+        return store.query('SELECT * FROM movies')
+
+
+class MovieStore(object):
+
+    # the database is opened read only, so that any number of processes can query it at the same time
+    def __init__(self, path):
+        self.connection=sqlite3.connect('file:{}?mode=ro'.format(path), uri=True, check_same_thread=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    # run a parametrized query and return the result as a dataframe
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    # movies credited to one or several values of an entity (genre, company, cast or director). With dominant=True only
+    # the movies where the value is the first (dominant) string are returned, as in the notebook's dataframes
+    def movies_by(self, entity, values, dominant=False):
+        if entity not in LINK_TABLES:
+            raise ValueError("Unknown entity {!r}, expected one of {}".format(entity, sorted(LINK_TABLES)))
+        table, column, value=LINK_TABLES[entity]
+        if isinstance(values, str):
+            values=[values]
+        placeholders=', '.join('?' for _ in values)
+        sql=('SELECT movies.* FROM movies WHERE movies.id IN '
+             '(SELECT id FROM {} WHERE {} IN ({}){})'.format(table, value, placeholders,
+                                                            ' AND position = 0' if dominant else ''))
+        return self.query(sql, list(values))
+
+    def movies_by_genre(self, genre, dominant=False):
+        return self.movies_by('genre', genre, dominant)
+
+    def movies_by_company(self, company, dominant=False):
+        return self.movies_by('company', company, dominant)
+
+    def movies_by_cast(self, actor, dominant=False):
+        return self.movies_by('cast', actor, dominant)
+
+    def movies_by_director(self, director, dominant=False):
+        return self.movies_by('director', director, dominant)
+
+    def movies_by_year(self, first_year, last_year=None):
+        last_year=first_year if last_year is None else last_year
+        return self.query('SELECT * FROM movies WHERE release_year BETWEEN ? AND ?', (first_year, last_year))
@@ -0,0 +1,131 @@
+
+# coding: utf-8
+
+# # Threshold Sweep of the Data Wrangling Filters
+
+# The minimum runtime (2 min), vote count (10 votes) and adjusted budget ($10,000) of the data wrangling, as well as the
+# minimum of 10 movies for a production company, are personal choices. sweep_thresholds reports the key results of the
+# analysis for every combination of a grid of these thresholds, to see how sensitive the conclusions are to them.
+#
+# The data wrangling is run once without any minimum. Every movie is then given, per threshold column, the number of
+# thresholds of the grid it passes. The sums needed by the results (counts, sums of the metrics, of their squares and
+# products for the correlations, per genre and per production company for the group means) are accumulated once per
+# combination of these levels and turned into suffix sums along every threshold axis: the sums over the movies passing a
+# grid point are then read at a single position, whatever the size of the grid.
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import movie_engine
+
+
+# thresholds applied with set_minimum in the notebook (movies are kept when strictly greater than the threshold)
+
+THRESHOLD_COLUMNS=['runtime', 'vote_count', 'budget_adj']
+
+# the notebook's thresholds
+
+DEFAULT_GRID={'runtime': [2], 'vote_count': [10], 'budget_adj': [10000], 'company_support': [10]}
+
+
+# define a function that takes in an array and returns its suffix sums along the given axes (position i holds the sum of
+# the positions i and above)
+
+def suffix_sums(values, axes):
+    for axis in axes:
+        values=np.flip(np.cumsum(np.flip(values, axis=axis), axis=axis), axis=axis)
+    return values
+
+
+# define a function that takes in the values of a column and a list of thresholds and returns, for every value, the
+# number of (sorted) thresholds it is strictly greater than. Missing values get level 0: as with set_minimum, they pass no
+# threshold
+
+def threshold_levels(values, thresholds):
+    values=np.asarray(values, dtype=np.float64)
+    levels=np.searchsorted(np.sort(np.asarray(thresholds, dtype=np.float64)), values, side='left')
+    levels[np.isnan(values)]=0
+    return levels
+
+
+# define a function that takes in a data source (csv file or dataframe) and a grid of thresholds (a dictionary of lists
+# for runtime, vote_count, budget_adj and company_support) and returns a dataframe with one row per grid point:
+# - the thresholds and the number of movies left
+# - one column per correlation of movie_engine.CORRELATIONS (e.g. 'r popularity/vote_count')
+# - genre_roi_ranking: genres sorted by average ROI (best first)
+# - top_companies: the top_k production companies by average ROI among the companies with at least company_support movies
+
+def sweep_thresholds(source, grid=DEFAULT_GRID, correlations=movie_engine.CORRELATIONS, top_k=5, engine='pandas'):
+    grid=dict(DEFAULT_GRID, **grid)
+    movies=movie_engine.run_pipeline(engine, source, minimums=[])['movies']
+
+    thresholds=[np.sort(np.asarray(grid[column], dtype=np.float64)) for column in THRESHOLD_COLUMNS]
+    shape=tuple(len(values)+1 for values in thresholds)
+    levels=np.ravel_multi_index([threshold_levels(movies[column], values)
+                                 for column, values in zip(THRESHOLD_COLUMNS, thresholds)], shape)
+
+    # moments for the correlations, on centred and scaled columns to keep the sums well conditioned. As in Series.corr,
+    # a pair of columns only uses the movies where both values are finite (their own count n)
+    columns=sorted(set(itertools.chain.from_iterable(correlations)))
+    values=movies[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    finite=np.isfinite(values)
+    values=np.where(finite, values, np.nan)
+    with np.errstate(invalid='ignore'):
+        scale=np.nanstd(values, axis=0) if len(values) else np.ones(len(columns))
+        values=(values-np.nanmean(values, axis=0))/np.where(scale > 0, scale, 1.0)
+    values=np.where(finite, values, 0.0)
+    position={column: index for index, column in enumerate(columns)}
+    moments=[np.ones(len(movies))]
+    for first, second in correlations:
+        both=(finite[:, position[first]] & finite[:, position[second]]).astype(np.float64)
+        x, y=values[:, position[first]]*both, values[:, position[second]]*both
+        moments.extend([both, x, y, x*x, y*y, x*y])
+    moment_sums=np.stack([np.bincount(levels, weights=moment, minlength=int(np.prod(shape))) for moment in moments],
+                         axis=-1).reshape(shape+(len(moments),))
+    moment_sums=suffix_sums(moment_sums, axes=range(len(shape)))
+
+    # number of movies, number of finite ROIs and their sum per genre and per production company. A missing ROI (e.g. a
+    # missing revenue_adj) counts as a movie but is left out of the average, as in groupby().mean()
+    roi=movies['ROI(%)'].to_numpy(dtype=np.float64, na_value=np.nan)
+    finite=np.isfinite(roi)
+    group_sums={}
+    for column in ['genres', 'production_companies']:
+        codes, names=pd.factorize(movies[column])
+        flat=levels*len(names)+codes
+        size=int(np.prod(shape))*len(names)
+        counts=np.bincount(flat, minlength=size).reshape(shape+(len(names),))
+        roi_counts=np.bincount(flat[finite], minlength=size).reshape(shape+(len(names),))
+        sums=np.bincount(flat[finite], weights=roi[finite], minlength=size).reshape(shape+(len(names),))
+        group_sums[column]=(np.asarray(names, dtype=object), suffix_sums(counts, axes=range(len(shape))),
+                            suffix_sums(roi_counts, axes=range(len(shape))), suffix_sums(sums, axes=range(len(shape))))
+
+    rows=[]
+    for point in itertools.product(*[range(len(values)) for values in thresholds]):
+        cell=tuple(index+1 for index in point)
+        sums=moment_sums[cell]
+        row={column: values[index] for column, values, index in zip(THRESHOLD_COLUMNS, thresholds, point)}
+        row['n_movies']=int(round(sums[0]))
+        for number, (first, second) in enumerate(correlations):
+            n, sx, sy, sxx, syy, sxy=sums[1+6*number:7+6*number]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                row['r {}/{}'.format(first, second)]=(n*sxy-sx*sy)/np.sqrt((n*sxx-sx*sx)*(n*syy-sy*sy))
+
+        # only the groups with at least one finite ROI are ranked
+        names, counts, roi_counts, roi_sums=group_sums['genres']
+        present=roi_counts[cell] > 0
+        means=roi_sums[cell][present]/roi_counts[cell][present]
+        genre_ranking=list(names[present][np.argsort(-means, kind='stable')])
+
+        names, counts, roi_counts, roi_sums=group_sums['production_companies']
+        for support in sorted(grid['company_support']):
+            supported=(counts[cell] >= max(support, 1)) & (roi_counts[cell] > 0)
+            means=roi_sums[cell][supported]/roi_counts[cell][supported]
+            top=np.argsort(-means, kind='stable')[:top_k]
+            rows.append(dict(row, company_support=support, genre_roi_ranking=genre_ranking,
+                             top_companies=list(names[supported][top])))
+
+    result=pd.DataFrame(rows)
+    leading=THRESHOLD_COLUMNS+['company_support', 'n_movies']
+    return result[leading+[column for column in result.columns if column not in leading]]
@@ -0,0 +1,170 @@
+
+# coding: utf-8
+
+# # Release Date Time Series
+
+# The notebook only groups the movies by the integer release_year and never uses release_date. The functions below parse
+# release_date once into a datetime64 index and ReleaseTimeSeries aggregates the metrics per month (or quarter) and per
+# genre. Rolling and expanding windows are computed from cumulative sums (a window is the difference of two cumulative
+# rows), so every window costs the same whatever its length and no groupby is run per window. New months of data can be
+# added with ReleaseTimeSeries.extend without aggregating the whole catalogue again.
+
+import numpy as np
+import pandas as pd
+
+import movie_engine
+
+
+TIMESERIES_METRICS=['popularity', 'revenue_adj', 'ROI(%)']
+
+
+# define a function that takes in a dataframe and returns its release dates as a datetime64 series. release_date is
+# written with a two digit year (e.g. 6/9/15) so the year is taken from release_year, otherwise movies from the 60s would be
+# parsed as 2060s movies
+
+def release_dates(frame):
+    parsed=pd.to_datetime(frame['release_date'], format='%m/%d/%y', errors='coerce')
+    if 'release_year' not in frame.columns:
+        return parsed
+    return pd.to_datetime(pd.DataFrame({'year': frame['release_year'], 'month': parsed.dt.month,
+                                        'day': parsed.dt.day}), errors='coerce')
+
+
+# define a function that takes in a dataframe and returns the dataframe indexed (and sorted) by its release dates. Rows
+# without a valid release date are dropped
+
+def with_release_index(frame):
+    if isinstance(frame.index, pd.DatetimeIndex):
+        return frame
+    dates=release_dates(frame)
+    indexed=frame.set_index(pd.DatetimeIndex(dates, name='release_date'))
+    return indexed[indexed.index.notna()].sort_index(kind='stable')
+
+
+class ReleaseTimeSeries(object):
+
+    # metrics are aggregated per period (freq 'M' for months, 'Q' for quarters) and per value of the by column (None
+    # for the whole catalogue). Pipe separated values of the by column count for every value listed
+    def __init__(self, frame=None, metrics=TIMESERIES_METRICS, by='genres', freq='M'):
+        self.metrics=list(metrics)
+        self.by=by
+        self.freq=freq
+        self.start=None
+        self.keys=pd.Index([], dtype=object, name=by)
+        self.sums=np.zeros((0, 0, len(self.metrics)))
+        self.counts=np.zeros((0, 0, len(self.metrics)))
+        # cumulative sums and counts with a leading row of zeros: window (a, b] = cumulative[b]-cumulative[a]
+        self.cumulative_sums=np.zeros((1, 0, len(self.metrics)))
+        self.cumulative_counts=np.zeros((1, 0, len(self.metrics)))
+        if frame is not None:
+            self.extend(frame)
+
+    @property
+    def periods(self):
+        if self.start is None:
+            return pd.PeriodIndex([], freq=self.freq, name='period')
+        return pd.period_range(self.start, periods=len(self.sums), freq=self.freq, name='period')
+
+    # sum and count of every metric per (period ordinal, key) for the rows of a dataframe
+    def _aggregate(self, frame):
+        frame=with_release_index(frame)
+        ordinals=frame.index.to_period(self.freq).asi8
+        if self.by is None:
+            keys=pd.Series('All', index=np.arange(len(frame)))
+        else:
+            keys=movie_engine.explode_pipes(frame[self.by].reset_index(drop=True))
+        rows=keys.index.to_numpy()
+        values=frame[self.metrics].to_numpy(dtype=np.float64)[rows]
+        finite=np.isfinite(values)
+        grouped=pd.DataFrame(np.where(finite, values, 0.0), columns=self.metrics)
+        grouped=grouped.join(pd.DataFrame(finite.astype(np.float64), columns=[m+' count' for m in self.metrics]))
+        grouped['ordinal']=ordinals[rows]
+        grouped['key']=keys.to_numpy()
+        return grouped.groupby(['ordinal', 'key']).sum()
+
+    # add the movies of a dataframe (typically the latest months) to the time series. Only the cumulative rows from the
+    # earliest period touched by the new data onwards are recomputed
+    def extend(self, frame):
+        aggregate=self._aggregate(frame)
+        if len(aggregate) == 0:
+            return self
+        ordinals=aggregate.index.get_level_values('ordinal').to_numpy()
+        new_keys=aggregate.index.get_level_values('key').unique().difference(self.keys)
+
+        # grow the arrays to cover new keys and new periods (before or after the current range)
+        if len(new_keys):
+            self.keys=self.keys.append(pd.Index(new_keys, name=self.by))
+            padding=((0, 0), (0, len(new_keys)), (0, 0))
+            self.sums=np.pad(self.sums, padding)
+            self.counts=np.pad(self.counts, padding)
+            self.cumulative_sums=np.pad(self.cumulative_sums, padding)
+            self.cumulative_counts=np.pad(self.cumulative_counts, padding)
+        first, last=ordinals.min(), ordinals.max()
+        if self.start is None:
+            self.start=pd.Period(ordinal=first, freq=self.freq)
+            before, after=0, last-first+1
+        else:
+            before=max(0, self.start.ordinal-first)
+            after=max(0, last-(self.start.ordinal+len(self.sums)-1))
+            self.start=pd.Period(ordinal=min(first, self.start.ordinal), freq=self.freq)
+        if before or after:
+            # new periods hold no movies: their sums are zero and their cumulative rows repeat the previous row
+            padding=((before, after), (0, 0), (0, 0))
+            self.sums=np.pad(self.sums, padding)
+            self.counts=np.pad(self.counts, padding)
+            self.cumulative_sums=np.pad(self.cumulative_sums, padding, mode='edge')
+            self.cumulative_counts=np.pad(self.cumulative_counts, padding, mode='edge')
+
+        rows=ordinals-self.start.ordinal
+        columns=self.keys.get_indexer(aggregate.index.get_level_values('key'))
+        np.add.at(self.sums, (rows, columns), aggregate[self.metrics].to_numpy())
+        np.add.at(self.counts, (rows, columns), aggregate[[m+' count' for m in self.metrics]].to_numpy())
+
+        touched=0 if before else rows.min()
+        self.cumulative_sums[touched+1:]=self.cumulative_sums[touched]+np.cumsum(self.sums[touched:], axis=0)
+        self.cumulative_counts[touched+1:]=self.cumulative_counts[touched]+np.cumsum(self.counts[touched:], axis=0)
+        return self
+
+    # turn a (periods x keys x metrics) array into a dataframe indexed by period with (metric, key) columns
+    def _frame(self, values):
+        columns=pd.MultiIndex.from_product([self.metrics, self.keys], names=['metric', self.by or 'key'])
+        return pd.DataFrame(values.transpose(0, 2, 1).reshape(len(values), -1), index=self.periods, columns=columns)
+
+    # cumulative row preceding the window of `window` periods ending at every period
+    def _window_starts(self, window):
+        return np.maximum(np.arange(1, len(self.sums)+1)-window, 0)
+
+    # average of every metric per period (no window)
+    def mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._frame(self.sums/self.counts)
+
+    # rolling average over the last `window` periods (including the current one). Windows with fewer than min_count
+    # movies are NaN
+    def rolling(self, window, min_count=1):
+        lower=self._window_starts(window)
+        sums=self.cumulative_sums[1:]-self.cumulative_sums[lower]
+        counts=self.cumulative_counts[1:]-self.cumulative_counts[lower]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._frame(np.where(counts >= max(min_count, 1), sums/counts, np.nan))
+
+    # rolling sum over the last `window` periods, e.g. the total revenue of the last 12 months
+    def rolling_sum(self, window):
+        return self._frame(self.cumulative_sums[1:]-self.cumulative_sums[self._window_starts(window)])
+
+    # average from the first period up to every period
+    def expanding(self, min_count=1):
+        counts=self.cumulative_counts[1:]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._frame(np.where(counts >= max(min_count, 1), self.cumulative_sums[1:]/counts, np.nan))
+
+    # average per month (or quarter) of the year over all years, e.g. the seasonal profile of popularity per genre
+    def seasonal(self):
+        position=self.periods.month if self.freq.startswith('M') else self.periods.quarter
+        sums=pd.DataFrame(self.sums.reshape(len(self.sums), -1)).groupby(np.asarray(position)).sum().to_numpy()
+        counts=pd.DataFrame(self.counts.reshape(len(self.counts), -1)).groupby(np.asarray(position)).sum().to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values=(sums/counts).reshape(len(sums), len(self.keys), len(self.metrics))
+        columns=pd.MultiIndex.from_product([self.metrics, self.keys], names=['metric', self.by or 'key'])
+        index=pd.Index(np.unique(np.asarray(position)), name='month' if self.freq.startswith('M') else 'quarter')
+        return pd.DataFrame(values.transpose(0, 2, 1).reshape(len(values), -1), index=index, columns=columns)
@@ -0,0 +1,122 @@
+
+# coding: utf-8
+
+# # Data Quality Validation with Quarantine Output
+
+# In the notebook bad rows are removed implicitly: zero budgets through the != 0 mask, missing values through
+# replace_EmptyWithNoData followed by a search of "No Data" with .str.contains, and infinite ROIs are never looked at.
+# validate_movies checks a declared rule set instead. Every rule is a vectorized mask over one column, the failed rules of
+# a row are recorded as bits of a single integer per row, rows failing any rule are written with their reason codes to
+# a quarantine file and the clean rows are returned together with the count of rows failing every rule.
+
+import numpy as np
+import pandas as pd
+
+
+# rule set: (reason code, kind of check, column, parameters)
+# - not_null: missing values (and empty strings) are rejected
+# - sentinel: the values listed are placeholders for missing data and are rejected
+# - range: values outside [low, high] are rejected (None for an open bound), missing values are left to not_null
+# - finite: infinite and missing values are rejected
+# - year_consistency: the two digit year of release_date must match release_year
+
+MOVIE_RULES=[('director_missing', 'not_null', 'director', None),
+             ('cast_missing', 'not_null', 'cast', None),
+             ('genres_missing', 'not_null', 'genres', None),
+             ('production_companies_missing', 'not_null', 'production_companies', None),
+             ('director_no_data', 'sentinel', 'director', ['No Data']),
+             ('cast_no_data', 'sentinel', 'cast', ['No Data']),
+             ('genres_no_data', 'sentinel', 'genres', ['No Data']),
+             ('production_companies_no_data', 'sentinel', 'production_companies', ['No Data']),
+             ('runtime_zero', 'sentinel', 'runtime', [0]),
+             ('budget_adj_zero', 'sentinel', 'budget_adj', [0]),
+             ('revenue_adj_zero', 'sentinel', 'revenue_adj', [0]),
+             ('runtime_range', 'range', 'runtime', (0, 1000)),
+             ('budget_adj_range', 'range', 'budget_adj', (0, None)),
+             ('revenue_adj_range', 'range', 'revenue_adj', (0, None)),
+             ('popularity_range', 'range', 'popularity', (0, None)),
+             ('vote_count_range', 'range', 'vote_count', (0, None)),
+             ('vote_average_range', 'range', 'vote_average', (0, 10)),
+             ('release_year_range', 'range', 'release_year', (1888, 2100)),
+             ('roi_not_finite', 'finite', 'ROI(%)', None),
+             ('release_year_mismatch', 'year_consistency', 'release_date', 'release_year')]
+
+
+# define a function that takes in a dataframe and a rule and returns a boolean array, True where the row fails the rule
+
+def rule_failures(frame, kind, column, parameters):
+    values=frame[column]
+    if kind == 'not_null':
+        missing=values.isna()
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            missing=missing | (values.astype(object) == '')
+        return missing.to_numpy(dtype=bool)
+    if kind == 'sentinel':
+        return values.isin(parameters).to_numpy(dtype=bool)
+    if kind == 'range':
+        numbers=pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        low, high=parameters
+        failures=np.zeros(len(numbers), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            if low is not None:
+                failures|=numbers < low
+            if high is not None:
+                failures|=numbers > high
+        return failures
+    if kind == 'finite':
+        numbers=pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        return ~np.isfinite(numbers)
+    if kind == 'year_consistency':
+        two_digits=pd.to_datetime(values, format='%m/%d/%y', errors='coerce').dt.year % 100
+        years=pd.to_numeric(frame[parameters], errors='coerce')
+        return ~(two_digits == years % 100).fillna(False).to_numpy(dtype=bool)
+    raise ValueError("Unknown rule kind {!r}".format(kind))
+
+
+# define a function that takes in a dataframe and a rule set and returns an integer per row with bit i set when the row
+# fails rule i. Rules on columns absent from the dataframe are skipped. The ROI is computed (revenue_adj / budget_adj) when
+# the dataframe has no ROI(%) column yet
+
+def failure_bits(frame, rules=MOVIE_RULES):
+    if 'ROI(%)' not in frame.columns and {'budget_adj', 'revenue_adj'} <= set(frame.columns):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frame=frame.assign(**{'ROI(%)': frame['revenue_adj']/frame['budget_adj']*100})
+    if len(rules) > 63:
+        raise ValueError("At most 63 rules can be checked at once")
+    bits=np.zeros(len(frame), dtype=np.int64)
+    for position, (code, kind, column, parameters) in enumerate(rules):
+        if column in frame.columns and (kind != 'year_consistency' or parameters in frame.columns):
+            bits|=rule_failures(frame, kind, column, parameters).astype(np.int64) << position
+    return bits
+
+
+# define a function that takes in the failure bits of the rows and the rule set and returns the reason codes of every row
+# (separated by "|" as the pipe columns of the data, empty for valid rows). Reasons are built once per distinct
+# combination of failed rules, not once per row
+
+def reason_codes(bits, rules=MOVIE_RULES):
+    combinations, inverse=np.unique(bits, return_inverse=True)
+    reasons=np.array(['|'.join(code for position, (code, kind, column, parameters) in enumerate(rules)
+                                if combination >> position & 1) for combination in combinations], dtype=object)
+    return reasons[inverse.ravel()]
+
+
+# define a function that takes in a dataframe, a rule set and the path of a quarantine csv file and returns the valid rows
+# and a summary series (number of rows failing every rule, plus the total of rejected and accepted rows). The rejected
+# rows are written to the quarantine file with a reasons column
+
+def validate_movies(frame, rules=MOVIE_RULES, quarantine_path=None):
+    bits=failure_bits(frame, rules)
+    rejected=bits != 0
+
+    summary=pd.Series({code: int(np.count_nonzero(bits >> position & 1))
+                       for position, (code, kind, column, parameters) in enumerate(rules)}, name='rows')
+    summary['rejected']=int(np.count_nonzero(rejected))
+    summary['accepted']=int(len(frame)-summary['rejected'])
+
+    if quarantine_path is not None:
+        quarantine=frame[rejected].copy()
+        quarantine['reasons']=reason_codes(bits[rejected], rules)
+        quarantine.to_csv(quarantine_path, index=False)
+
+    return frame[~rejected], summary
@@ -0,0 +1,34 @@
+
+# coding: utf-8
+
+# # Tests of the Command Line Entry Point
+#
+#     python -m pytest -q test_movie_analysis.py
+
+import os
+
+import movie_analysis
+import test_movie_sweep
+
+
+def test_startup_stays_within_budgets(tmp_path):
+    path=str(tmp_path/'movies.csv')
+    test_movie_sweep.synthetic_movies().to_csv(path, index=False)
+
+    measurements=movie_analysis.measure_startup(path)
+    assert measurements['heavy_modules'] == []
+    assert movie_analysis.startup_problems(measurements) == []
+
+
+def test_sections_and_cache_per_engine(tmp_path, capsys):
+    path=str(tmp_path/'movies.csv')
+    test_movie_sweep.synthetic_movies().to_csv(path, index=False)
+
+    assert movie_analysis.main(['--data', path, '--only', 'summary, correlations, ']) == 0
+    output=capsys.readouterr().out
+    assert "The original data has a total of 480 movies." in output
+    assert "Pearson r between popularity and vote_count" in output
+    assert os.path.exists(movie_analysis.cache_location(path, 'pandas')[0])
+    assert not os.path.exists(movie_analysis.cache_location(path, 'arrow')[0])
+
+    assert movie_analysis.main(['--data', path, '--only', 'summary,unknown']) == 2
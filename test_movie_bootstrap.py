@@ -0,0 +1,58 @@
+
+# coding: utf-8
+
+# # Tests of the Bootstrap Confidence Intervals
+#
+#     python -m pytest -q test_movie_bootstrap.py
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import movie_bootstrap
+import movie_engine
+
+
+# define a function that returns a movies dataframe with a few missing revenues and popularities and an infinite ROI
+
+def synthetic_movies(n=200, seed=0):
+    rng=np.random.default_rng(seed)
+    frame=pd.DataFrame({'genres': rng.choice(['Drama', 'Comedy', 'Action', 'Horror'], n),
+                        'popularity': rng.gamma(2.0, 0.5, n),
+                        'vote_count': rng.integers(10, 500, n).astype(np.float64),
+                        'vote_average': rng.uniform(3, 9, n),
+                        'budget_adj': rng.uniform(1e5, 2e8, n),
+                        'revenue_adj': rng.uniform(0, 8e8, n)})
+    frame['ROI(%)']=frame['revenue_adj']/frame['budget_adj']*100
+    frame.loc[rng.choice(n, 10, replace=False), 'revenue_adj']=np.nan
+    frame.loc[rng.choice(n, 10, replace=False), 'popularity']=np.nan
+    frame.loc[0, 'ROI(%)']=np.inf
+    return frame
+
+
+def test_estimates_skip_missing_values_as_pandas():
+    movies=synthetic_movies()
+    finite=movies.replace(np.inf, np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        correlations=movie_bootstrap.bootstrap_correlations(movies, n_resamples=200, workers=1)
+        means=movie_bootstrap.bootstrap_group_means(movies, n_resamples=200, workers=1)
+
+    expected=[finite[x].corr(finite[y]) for x, y in movie_engine.CORRELATIONS]
+    np.testing.assert_allclose(correlations['r'], expected, rtol=1e-9)
+    assert ((correlations['percentile_low'] <= correlations['r']) &
+            (correlations['r'] <= correlations['percentile_high'])).all()
+
+    expected=finite.groupby('genres')[movie_bootstrap.GROUP_METRICS].agg(['mean', 'count'])
+    for row in means.itertuples(index=False):
+        np.testing.assert_allclose(row.mean, expected.loc[row.genres, (row.metric, 'mean')], rtol=1e-9)
+        assert row.movies == expected.loc[row.genres, (row.metric, 'count')]
+        assert row.percentile_low <= row.mean <= row.percentile_high
+
+
+def test_replicates_do_not_depend_on_the_workers():
+    movies=synthetic_movies()
+    single=movie_bootstrap.bootstrap_group_means(movies, n_resamples=300, block_size=100, workers=1)
+    pooled=movie_bootstrap.bootstrap_group_means(movies, n_resamples=300, block_size=100, workers=2)
+    pd.testing.assert_frame_equal(single, pooled)
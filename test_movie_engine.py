@@ -0,0 +1,73 @@
+
+# coding: utf-8
+
+# # Tests of the Execution Engines
+#
+#     python -m pytest -q test_movie_engine.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import movie_engine
+
+pytest.importorskip('pyarrow')
+
+
+# define a function that returns a small movies dataframe with the cases the engines must agree on: a duplicated row,
+# missing and "No Data" pipe values, zero budgets / revenues / runtimes, values on the minimums and production companies
+# tied on their number of movies (ties are listed in order of first appearance)
+
+def synthetic_movies():
+    n=16
+    return pd.DataFrame({'id': np.arange(n),
+                         'imdb_id': ['tt{:02d}'.format(number) for number in range(n)],
+                         'popularity': np.linspace(0.5, 6.0, n),
+                         'budget': np.full(n, 1000),
+                         'revenue': np.full(n, 2000),
+                         'original_title': ['Movie {}'.format(number) for number in range(n)],
+                         'cast': ['A|B', 'B', 'C|A', 'D', 'E', 'F', 'G', 'A', 'B|C', 'C', np.nan, 'D', 'E', 'F',
+                                  'No Data', 'G'],
+                         'homepage': np.nan,
+                         'director': ['X', 'Y|X', 'Z', 'X', 'Y', 'Z', 'X', 'Y', 'Z', 'X', 'Y', np.nan, 'Z', 'X', 'Y',
+                                      'Z'],
+                         'tagline': np.nan,
+                         'keywords': np.nan,
+                         'overview': np.nan,
+                         'runtime': [90, 100, 110, 95, 120, 130, 85, 105, 98, 3, 100, 90, 0, 2, 95, 80],
+                         'genres': ['Drama|Action', 'Comedy', 'Drama', 'Action', 'Comedy|Drama', 'Drama', 'Action',
+                                    'Comedy', 'Drama', 'Action|Comedy', 'Comedy', 'Drama', 'Action', 'Drama',
+                                    'Comedy', 'Drama'],
+                         'production_companies': ['Zeta|Alpha', 'Alpha', 'Beta|Zeta', 'Gamma', 'Beta', 'Alpha',
+                                                  'Zeta|Beta', 'Gamma', 'Delta', 'Beta', 'Zeta', 'Alpha', 'Beta',
+                                                  np.nan, 'No Data', 'Zeta'],
+                         'release_date': ['1/{}/15'.format(number+1) for number in range(n)],
+                         'vote_count': [50, 11, 200, 40, 30, 60, 70, 80, 90, 11, 25, 100, 20, 30, 40, 10],
+                         'vote_average': np.linspace(4.0, 8.0, n),
+                         'release_year': [2015, 2014, 2015, 2013, 2014, 2015, 2013, 2014, 2015, 2013, 2014, 2015,
+                                          2013, 2014, 2015, 2013],
+                         'budget_adj': [2e6, 5e5, 1e6, 1e6, 3e6, 4e6, 2e5, 9e5, 7e5, 10001.0, 0.0, 1.5e6, 8e5,
+                                        6e5, 5e5, 10000.0],
+                         'revenue_adj': [5e6, 1e6, 1e6, 2e6, 1e6, 8e6, 4e5, 0.0, 1e6, 5e4, 4e6, 2e6, 3e6, 1e6,
+                                         2e6, 3e6]})
+
+
+def test_compare_engines_on_dataframe():
+    movies=synthetic_movies()
+    movies=pd.concat([movies, movies.iloc[[3]]], ignore_index=True)
+    results=movie_engine.compare_engines(movies)
+    assert len(results['pandas']['movies']) == len(results['arrow']['movies']) > 0
+    assert not results['pandas']['movies']['production_companies'].str.contains('No Data').any()
+
+
+def test_compare_engines_on_csv(tmp_path):
+    path=tmp_path/'movies.csv'
+    synthetic_movies().to_csv(path, index=False)
+    results=movie_engine.compare_engines(str(path))
+    assert list(results['arrow']['production_companies'].index) == list(results['pandas']['production_companies'].index)
+
+
+def test_compare_engines_detects_differences(monkeypatch):
+    monkeypatch.setattr(movie_engine.ArrowEngine, 'set_minimum', lambda self, table, column, minimum: table)
+    with pytest.raises(AssertionError):
+        movie_engine.compare_engines(synthetic_movies())
@@ -0,0 +1,104 @@
+
+# coding: utf-8
+
+# # Tests of the Fuzzy Title Search
+#
+#     python -m pytest -q test_movie_search.py
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+import movie_search
+
+
+WORDS=['star', 'wars', 'jurassic', 'world', 'night', 'day', 'return', 'dark', 'knight', 'love', 'story', 'the', 'of',
+       'lost', 'city', 'mad', 'max', 'fury', 'road', 'inside', 'out']
+
+QUERIES=['star wars', 'jurasic wrld', 'the dark knigt', 'mad max', 'love', 'Director 7', 'zzz', 'city of night']
+
+
+# define a function that returns a small movies dataframe with titles made of a few common words (many near duplicates)
+
+def synthetic_movies(n=120, seed=0, first_id=0):
+    rng=np.random.default_rng(seed)
+    titles=[' '.join(rng.choice(WORDS, rng.integers(1, 4))).title() for number in range(n)]
+    return pd.DataFrame({'id': np.arange(first_id, first_id+n),
+                         'original_title': titles,
+                         'director': ['Director {}'.format(number) for number in rng.integers(0, 30, n)],
+                         'popularity': rng.random(n)})
+
+
+# define a function that takes in a string and returns its set of trigrams, computed with plain python strings
+
+@functools.lru_cache(maxsize=None)
+def reference_trigrams(text):
+    padded='  '+movie_search.normalize([text]).iloc[0]+' '
+    return {padded[start:start+3] for start in range(len(padded)-2)}
+
+
+# define a function that takes in the movies, a query and the search parameters and returns the ids and scores expected
+# from TitleIndex.search, scoring every (movie, field) pair with the Dice coefficient
+
+def reference_search(movies, query, k=10, min_score=0.3, fields=movie_search.SEARCH_FIELDS):
+    query=reference_trigrams(query)
+    rows=[]
+    for movie in movies.itertuples(index=False):
+        scores=[]
+        for field in movie_search.SEARCH_FIELDS:
+            document=reference_trigrams(getattr(movie, field))
+            score=2.0*len(query & document)/(len(query)+len(document)) if field in fields else 0.0
+            scores.append(score)
+        if max(scores) >= min_score and max(scores) > 0:
+            rows.append((movie.id, max(scores)))
+    rows.sort(key=lambda row: (-row[1], row[0]))
+    return rows[:k]
+
+
+# define a function that takes in the result of TitleIndex.search and returns its (id, score) pairs
+
+def search_pairs(result):
+    return list(zip(result['id'].tolist(), result['score'].tolist()))
+
+
+def assert_same_results(index, movies):
+    for query in QUERIES:
+        for fields in [movie_search.SEARCH_FIELDS, ['original_title'], ['director']]:
+            expected=reference_search(movies, query, k=7, min_score=0.2, fields=fields)
+            actual=search_pairs(index.search(query, k=7, min_score=0.2, fields=fields))
+            assert [movie for movie, score in actual] == [movie for movie, score in expected], (query, fields)
+            np.testing.assert_allclose([score for movie, score in actual], [score for movie, score in expected])
+
+
+def test_insert_and_compact_match_brute_force():
+    movies=synthetic_movies()
+    index=movie_search.TitleIndex(movies.iloc[:20], columns=list(movies.columns))
+    # more inserts than MAX_SEGMENTS, so the segments are merged on the way
+    for start in range(20, len(movies), 10):
+        index.insert(movies.iloc[start:start+10])
+    assert 1 <= len(index.segments) <= movie_search.MAX_SEGMENTS
+    assert len(index) == len(movies)
+    assert_same_results(index, movies)
+
+
+def test_save_load_insert_round_trip(tmp_path):
+    movies=synthetic_movies()
+    extra=synthetic_movies(n=30, seed=1, first_id=len(movies))
+    movie_search.TitleIndex(movies, columns=list(movies.columns)).save(str(tmp_path))
+
+    loaded=movie_search.TitleIndex.load(str(tmp_path))
+    assert isinstance(loaded.segments[0]['documents'], np.memmap)
+    assert_same_results(loaded, movies)
+
+    # save the memory mapped segments over the files they are mapped from
+    loaded.save(str(tmp_path))
+    assert_same_results(loaded, movies)
+    assert_same_results(movie_search.TitleIndex.load(str(tmp_path)), movies)
+
+    # insert new movies and save the index again
+    loaded.insert(extra)
+    loaded.save(str(tmp_path))
+    both=pd.concat([movies, extra], ignore_index=True)
+    assert_same_results(loaded, both)
+    assert_same_results(movie_search.TitleIndex.load(str(tmp_path)), both)
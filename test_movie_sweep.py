@@ -0,0 +1,68 @@
+
+# coding: utf-8
+
+# # Tests of the Threshold Sweep
+#
+#     python -m pytest -q test_movie_sweep.py
+
+import numpy as np
+import pandas as pd
+
+import movie_engine
+import movie_sweep
+
+
+GRID={'runtime': [2, 60, 100], 'vote_count': [10, 50], 'budget_adj': [10000, 1e6, 5e7, 1e8],
+      'company_support': [1, 5, 10]}
+
+
+# define a function that returns a movies dataframe with pipe separated columns and a few missing runtimes, popularities
+# and revenues (a missing revenue_adj gives a missing ROI)
+
+def synthetic_movies(n=480, seed=0):
+    rng=np.random.default_rng(seed)
+    genres=['Drama', 'Comedy', 'Action', 'Horror', 'Romance', 'Documentary', 'Animation']
+    companies=['Company {}'.format(number) for number in range(15)]
+    frame=pd.DataFrame({'id': np.arange(n),
+                        'imdb_id': ['tt{:05d}'.format(number) for number in range(n)],
+                        'popularity': rng.gamma(2.0, 0.5, n),
+                        'original_title': ['Movie {}'.format(number) for number in range(n)],
+                        'cast': ['Actor {}|Actor {}'.format(*rng.integers(0, 50, 2)) for number in range(n)],
+                        'director': ['Director {}'.format(number) for number in rng.integers(0, 40, n)],
+                        'runtime': rng.integers(0, 180, n).astype(np.float64),
+                        'genres': ['|'.join(rng.choice(genres, 2, replace=False)) for number in range(n)],
+                        'production_companies': ['|'.join(rng.choice(companies, 2, replace=False))
+                                                 for number in range(n)],
+                        'vote_count': rng.integers(0, 200, n),
+                        'vote_average': rng.uniform(3, 9, n),
+                        'release_year': rng.integers(1960, 2016, n),
+                        'budget_adj': rng.uniform(0, 2e8, n),
+                        'revenue_adj': rng.uniform(0, 8e8, n)})
+    frame.loc[rng.choice(n, 12, replace=False), 'runtime']=np.nan
+    frame.loc[rng.choice(n, 12, replace=False), 'popularity']=np.nan
+    frame.loc[rng.choice(n, 20, replace=False), 'revenue_adj']=np.nan
+    return frame
+
+
+def test_sweep_matches_run_pipeline():
+    movies=synthetic_movies()
+    sweep=movie_sweep.sweep_thresholds(movies, GRID, top_k=3)
+    assert len(sweep) == np.prod([len(values) for values in GRID.values()])
+
+    for position, row in sweep.iterrows():
+        minimums=[('runtime', row['runtime']), ('vote_count', row['vote_count']), ('budget_adj', row['budget_adj'])]
+        results=movie_engine.run_pipeline('pandas', movies, minimums=minimums)
+        expected=results['movies']
+        assert row['n_movies'] == len(expected)
+
+        for first, second in movie_engine.CORRELATIONS:
+            np.testing.assert_allclose(row['r {}/{}'.format(first, second)], expected[first].corr(expected[second]),
+                                       rtol=1e-7)
+
+        genres=results['genres'].dropna(subset=['ROI(%)']).sort_values('ROI(%)', ascending=False)
+        assert row['genre_roi_ranking'] == genres['genres'].tolist()
+
+        counts=expected['production_companies'].value_counts()
+        supported=expected[expected['production_companies'].isin(counts[counts >= row['company_support']].index)]
+        means=supported.groupby('production_companies')['ROI(%)'].mean().dropna()
+        assert row['top_companies'] == means.sort_values(ascending=False).index[:3].tolist()
@@ -0,0 +1,73 @@
+
+# coding: utf-8
+
+# # Tests of the Release Date Time Series
+#
+#     python -m pytest -q test_movie_timeseries.py
+
+import numpy as np
+import pandas as pd
+
+import movie_timeseries
+
+
+# define a function that returns a small movies dataframe released over 1965-1974, with pipe separated genres (one genre
+# only appears from 1972 on) and a few missing popularities
+
+def synthetic_movies(n=300, seed=0):
+    rng=np.random.default_rng(seed)
+    dates=pd.Timestamp('1965-01-01')+pd.to_timedelta(rng.integers(0, 3650, n), unit='D')
+    genres=np.array(['Drama', 'Action|Drama', 'Comedy', 'Action', 'Comedy|Drama'], dtype=object)[rng.integers(0, 5, n)]
+    genres[dates.year >= 1972]=np.where(rng.random(np.count_nonzero(dates.year >= 1972)) < 0.3, 'Western|Drama',
+                                        genres[dates.year >= 1972])
+    popularity=rng.random(n)*10
+    popularity[rng.choice(n, 10, replace=False)]=np.nan
+    return pd.DataFrame({'release_date': ['{}/{}/{:02d}'.format(date.month, date.day, date.year % 100) for date in dates],
+                         'release_year': dates.year,
+                         'genres': genres,
+                         'popularity': popularity,
+                         'revenue_adj': rng.random(n)*1e8})
+
+
+# define a function that takes in a dataframe and returns the sum and the count of the metric per (month, genre) with
+# pandas, over every month between the first and the last release
+
+def monthly_reference(frame, metric):
+    exploded=frame.assign(month=movie_timeseries.release_dates(frame).dt.to_period('M'),
+                          genre=frame['genres'].str.split('|')).explode('genre')
+    grouped=exploded.groupby(['month', 'genre'])[metric]
+    periods=pd.period_range(exploded['month'].min(), exploded['month'].max(), freq='M', name='period')
+    sums=grouped.sum().unstack(fill_value=0.0).reindex(periods, fill_value=0.0)
+    counts=grouped.count().unstack(fill_value=0).reindex(periods, fill_value=0)
+    return sums, counts
+
+
+def test_extend_matches_a_full_build():
+    movies=synthetic_movies()
+    full=movie_timeseries.ReleaseTimeSeries(movies, metrics=['popularity', 'revenue_adj'])
+
+    # chunks added out of order: the middle years, then the latest ones (with a new genre), then the earliest ones
+    years=movies['release_year']
+    incremental=movie_timeseries.ReleaseTimeSeries(movies[(years >= 1968) & (years < 1971)],
+                                                   metrics=['popularity', 'revenue_adj'])
+    incremental.extend(movies[years >= 1971]).extend(movies[years < 1968])
+
+    assert incremental.periods.equals(full.periods)
+    for method, arguments in [('mean', ()), ('expanding', ()), ('rolling', (12,)), ('rolling_sum', (6,))]:
+        expected=getattr(full, method)(*arguments)
+        actual=getattr(incremental, method)(*arguments).reindex(columns=expected.columns)
+        pd.testing.assert_frame_equal(actual, expected, obj=method)
+
+
+def test_rolling_matches_pandas():
+    movies=synthetic_movies()
+    series=movie_timeseries.ReleaseTimeSeries(movies, metrics=['popularity'])
+    sums, counts=monthly_reference(movies, 'popularity')
+
+    expected=sums.rolling(12, min_periods=1).sum()/counts.rolling(12, min_periods=1).sum()
+    actual=series.rolling(12)['popularity'].reindex(columns=expected.columns)
+    pd.testing.assert_frame_equal(actual, expected, check_names=False, check_freq=False)
+
+    expected=sums.rolling(3, min_periods=1).sum()
+    actual=series.rolling_sum(3)['popularity'].reindex(columns=expected.columns)
+    pd.testing.assert_frame_equal(actual, expected, check_names=False, check_freq=False)